@@ -2,18 +2,18 @@ import functools
 import logging
 import re
 
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.routing import APIRoute
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 
 from .apis import API_ROUTERS
-from .ctx import AppCtx, bind_app_ctx, create_app_ctx
+from .ctx import AppCtx, create_app_ctx
 from .settings import AppSettings
 from .utils.fastapi import (
     FASTAPI_RESPONSES,
-    ErrorReportAndForgetMiddleware,
+    AppCtxMiddleware,
+    ModelJSONResponse,
     validation_error_hadler,
 )
 
@@ -21,9 +21,10 @@ logger = logging.getLogger(__name__)
 
 
 def create_app(app_settings: AppSettings) -> FastAPI:
-    app = FastAPI(responses=FASTAPI_RESPONSES)
+    # response models are encoded as they are returned by the routes
+    app = FastAPI(responses=FASTAPI_RESPONSES, default_response_class=ModelJSONResponse)
 
-    app.add_middleware(ErrorReportAndForgetMiddleware)
+    app.add_middleware(AppCtxMiddleware)
 
     if app_settings.DEBUG_ALLOW_CORS_ALL_ORIGIN:
         app.add_middleware(
@@ -35,16 +36,6 @@ def create_app(app_settings: AppSettings) -> FastAPI:
         )
         logger.error("`DEBUG_ALLOW_CORS_ALL_ORIGIN` is on!")
 
-    async def _ctx_middleware(
-        request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
-        app_ctx: AppCtx = request.app.extra["_app_ctx"]
-        async with bind_app_ctx(app_ctx):
-            response = await call_next(request)
-        return response
-
-    app.add_middleware(BaseHTTPMiddleware, dispatch=_ctx_middleware)
-
     app.add_event_handler(
         "startup", functools.partial(_web_app_startup, app, app_settings)
     )
@@ -76,10 +67,24 @@ async def _web_app_startup(app: FastAPI, app_settings: AppSettings) -> None:
     app_ctx = await create_app_ctx(app_settings)
     app.extra["_app_ctx"] = app_ctx
 
+    if app_settings.PASSWORD_HASHING_TARGET_SECONDS is not None:
+        await app_ctx.password_hasher.calibrate(
+            app_settings.PASSWORD_HASHING_TARGET_SECONDS
+        )
+
+    await app_ctx.db_listener.start()
+
 
 async def _web_app_shutdown(app: FastAPI) -> None:
     app_ctx: AppCtx = app.extra["_app_ctx"]
 
+    try:
+        await app_ctx.db_listener.stop()
+    except Exception:
+        logger.warning("Failed to stop DB listener", exc_info=True)
+
+    app_ctx.password_hasher.shutdown()
+
     try:
         await app_ctx.db.engine.dispose()
     except Exception:
@@ -13,6 +13,7 @@ from app.ctx import AppCtx
 from app.models import orm as m
 from app.utils import auth as auth_utils
 from app.utils import fastapi as fastapi_utils
+from app.utils import sqla as sqla_utils
 
 router = fastapi_utils.CustomAPIRouter(prefix="/account", tags=["account"])
 
@@ -198,17 +199,11 @@ async def _(
         "-created": m.AccountLogin.created.desc(),
     }[q.sort_by]
 
-    account_logins = (
-        (
-            await AppCtx.current.db.session.execute(
-                sa_exp.select(m.AccountLogin)
-                .where(m.AccountLogin.account_id == auth_info.account_id)
-                .order_by(order_by_exp)
-                .slice(q.skip, q.skip + q.count)
-            )
-        )
-        .scalars()
-        .all()
+    account_logins = await sqla_utils.read_rows(
+        sa_exp.select(m.AccountLogin.id, m.AccountLogin.ipaddr, m.AccountLogin.created)
+        .where(m.AccountLogin.account_id == auth_info.account_id)
+        .order_by(order_by_exp)
+        .slice(q.skip, q.skip + q.count)
     )
 
     return [
@@ -0,0 +1,237 @@
+import datetime
+import uuid
+from typing import NamedTuple
+
+import numpy as np
+from fastapi import Depends
+from pydantic import BaseModel, Field
+from sqlalchemy import func as sa_func
+from sqlalchemy.sql import expression as sa_exp
+
+from app.ctx import AppCtx
+from app.models import orm as m
+from app.utils import fastapi as fastapi_utils
+
+router = fastapi_utils.CustomAPIRouter(prefix="/analytics", tags=["analytics"])
+
+_EPOCH = datetime.date(1970, 1, 1)
+# 1970-01-01 is a Thursday, so weeks starting on Monday begin 3 days earlier
+_EPOCH_WEEKDAY_OFFSET = 3
+
+
+class TrainingColumns(NamedTuple):
+    """Every performance log as parallel arrays, grouped by exercise category."""
+
+    exercise_category_ids: list[uuid.UUID]
+    # index of `exercise_category_ids` of each log
+    category_codes: np.ndarray
+    # days since 1970-01-01 of each log's daily log
+    days: np.ndarray
+    weights: np.ndarray
+    counts: np.ndarray
+
+
+class Trends(NamedTuple):
+    first_day: int
+    # average daily volume of the `window` days up to each day from `first_day`
+    rolling_volumes: np.ndarray
+
+    first_week: int
+    # volume of each week from `first_week`, and its change from the week before
+    weekly_volumes: np.ndarray
+    week_over_week_changes: np.ndarray
+
+    # weight change per week of each exercise category, by least squares
+    progression_slopes: np.ndarray
+    log_counts: np.ndarray
+
+
+async def load_training_columns(since: datetime.date | None) -> TrainingColumns:
+    # NOTE : one row of arrays per category, so that the rows are decoded in
+    #        bulk by the driver instead of as ORM objects.
+    query = (
+        sa_exp.select(
+            m.PerformanceLog.exercise_category_id,
+            sa_func.array_agg(m.DailyLog.date - _EPOCH),
+            sa_func.array_agg(m.PerformanceLog.weight),
+            sa_func.array_agg(m.PerformanceLog.count),
+        )
+        .join_from(
+            m.PerformanceLog,
+            m.DailyLog,
+            m.PerformanceLog.daily_log_id == m.DailyLog.id,
+        )
+        .group_by(m.PerformanceLog.exercise_category_id)
+    )
+    if since is not None:
+        query = query.where(m.DailyLog.date >= since)
+
+    rows = (await AppCtx.current.db.session.execute(query)).all()
+
+    return TrainingColumns(
+        exercise_category_ids=[row[0] for row in rows],
+        category_codes=np.repeat(
+            np.arange(len(rows)), [len(row[1]) for row in rows]
+        ).astype(np.int64),
+        days=np.concatenate([row[1] for row in rows] or [[]]).astype(np.int64),
+        weights=np.concatenate([row[2] for row in rows] or [[]]).astype(np.int64),
+        counts=np.concatenate([row[3] for row in rows] or [[]]).astype(np.int64),
+    )
+
+
+def compute_trends(columns: TrainingColumns, window: int) -> Trends:
+    """Computes the trends with vectorized operations only. Must have a log."""
+    volumes = columns.weights * columns.counts
+
+    first_day = int(columns.days.min())
+    day_offsets = columns.days - first_day
+
+    # rolling average of the daily volumes, by differences of cumulative sums
+    daily_volumes = np.bincount(day_offsets, weights=volumes)
+    cumulative = np.concatenate((np.zeros(1), np.cumsum(daily_volumes)))
+    window_ends = np.arange(1, len(daily_volumes) + 1)
+    window_starts = np.maximum(window_ends - window, 0)
+    rolling_volumes = (cumulative[window_ends] - cumulative[window_starts]) / (
+        window_ends - window_starts
+    )
+
+    weeks = (columns.days + _EPOCH_WEEKDAY_OFFSET) // 7
+    first_week = int(weeks.min())
+    weekly_volumes = np.bincount(weeks - first_week, weights=volumes)
+    week_over_week_changes = np.full(len(weekly_volumes), np.nan)
+    np.divide(
+        weekly_volumes[1:] - weekly_volumes[:-1],
+        weekly_volumes[:-1],
+        out=week_over_week_changes[1:],
+        where=weekly_volumes[:-1] > 0,
+    )
+
+    # least squares per category from the per-category sums
+    category_count = len(columns.exercise_category_ids)
+    xs = day_offsets / 7
+    ys = columns.weights.astype(np.float64)
+    log_counts = np.bincount(columns.category_codes, minlength=category_count)
+    sum_x = np.bincount(columns.category_codes, weights=xs, minlength=category_count)
+    sum_y = np.bincount(columns.category_codes, weights=ys, minlength=category_count)
+    sum_xy = np.bincount(
+        columns.category_codes, weights=xs * ys, minlength=category_count
+    )
+    sum_xx = np.bincount(
+        columns.category_codes, weights=xs * xs, minlength=category_count
+    )
+    denominators = log_counts * sum_xx - sum_x * sum_x
+    progression_slopes = np.full(category_count, np.nan)
+    np.divide(
+        log_counts * sum_xy - sum_x * sum_y,
+        denominators,
+        out=progression_slopes,
+        # all the logs on the same day have no slope
+        where=denominators > 1e-9,
+    )
+
+    return Trends(
+        first_day=first_day,
+        rolling_volumes=rolling_volumes,
+        first_week=first_week,
+        weekly_volumes=weekly_volumes,
+        week_over_week_changes=week_over_week_changes,
+        progression_slopes=progression_slopes,
+        log_counts=log_counts,
+    )
+
+
+def _nan_to_none(values: np.ndarray) -> list[float | None]:
+    return [None if np.isnan(value) else value for value in values.tolist()]
+
+
+class AnalyticsTrendsRequest(BaseModel):
+    since: datetime.date | None = Field(
+        default=None,
+        description="If set, only the logs of this day or later.",
+    )
+    window: int = Field(
+        default=7,
+        description="The number of days averaged into `rolling_volumes`",
+        ge=1,
+        le=365,
+    )
+
+
+class AnalyticsCategoryProgressionResponse(BaseModel):
+    exercise_category_id: uuid.UUID
+    log_count: int
+    slope: float | None = Field(
+        description="Weight change per week. `null` if logged on one day only.",
+    )
+
+
+class AnalyticsTrendsResponse(BaseModel):
+    dates: list[datetime.date] = Field(description="Every day of the logs")
+    rolling_volumes: list[float] = Field(
+        description="Average daily volume of the `window` days up to each date",
+    )
+    week_starts: list[datetime.date] = Field(
+        description="Monday of every week of the logs",
+    )
+    weekly_volumes: list[int]
+    week_over_week_changes: list[float | None] = Field(
+        description=(
+            "Volume change ratio from the week before. `null` if the week "
+            "before has no volume."
+        ),
+    )
+    categories: list[AnalyticsCategoryProgressionResponse]
+
+
+@router.api_wrapper(
+    "GET",
+    "/trends",
+    error_codes=[],
+)
+async def analytics_trends(
+    q: AnalyticsTrendsRequest = Depends(),
+) -> AnalyticsTrendsResponse:
+    columns = await load_training_columns(q.since)
+
+    if not len(columns.days):
+        return AnalyticsTrendsResponse(
+            dates=[],
+            rolling_volumes=[],
+            week_starts=[],
+            weekly_volumes=[],
+            week_over_week_changes=[],
+            categories=[],
+        )
+
+    trends = compute_trends(columns, q.window)
+
+    first_date = _EPOCH + datetime.timedelta(days=trends.first_day)
+    first_week_start = _EPOCH + datetime.timedelta(
+        days=trends.first_week * 7 - _EPOCH_WEEKDAY_OFFSET
+    )
+
+    return AnalyticsTrendsResponse(
+        dates=[
+            first_date + datetime.timedelta(days=offset)
+            for offset in range(len(trends.rolling_volumes))
+        ],
+        rolling_volumes=trends.rolling_volumes.tolist(),
+        week_starts=[
+            first_week_start + datetime.timedelta(weeks=offset)
+            for offset in range(len(trends.weekly_volumes))
+        ],
+        weekly_volumes=trends.weekly_volumes.astype(np.int64).tolist(),
+        week_over_week_changes=_nan_to_none(trends.week_over_week_changes),
+        categories=[
+            AnalyticsCategoryProgressionResponse(
+                exercise_category_id=exercise_category_id,
+                log_count=log_count,
+                slope=slope,
+            )
+            for exercise_category_id, log_count, slope in zip(
+                columns.exercise_category_ids,
+                trends.log_counts.tolist(),
+                _nan_to_none(trends.progression_slopes),
+            )
+        ],
+    )
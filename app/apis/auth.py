@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 import logging
+import uuid
 
 import sqlalchemy.exc
-from fastapi import Depends, Request
+from fastapi import BackgroundTasks, Depends, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel, Field, SecretStr
 from sqlalchemy.sql import expression as sa_exp
@@ -37,6 +38,8 @@ class SignupPostResponse(BaseModel):
         fastapi_utils.LogicErrorCodeEnum.DuplicatedUsername,
         fastapi_utils.LogicErrorCodeEnum.RaceCondition,
     ],
+    rate_limit=fastapi_utils.RateLimit(rate=1 / 60, burst=5),
+    responses=fastapi_utils.SERVICE_UNAVAILABLE_RESPONSES,
 )
 async def _(q: SignupPostRequest) -> SignupPostResponse:
     is_username_conflict = (
@@ -83,9 +86,12 @@ class LoginPostResponse(BaseModel):
         fastapi_utils.LogicErrorCodeEnum.DuplicatedUsername,
         fastapi_utils.LogicErrorCodeEnum.WrongPassword,
     ],
+    rate_limit=fastapi_utils.RateLimit(rate=1 / 6, burst=10),
+    responses=fastapi_utils.SERVICE_UNAVAILABLE_RESPONSES,
 )
 async def _(
     request: Request,
+    background_tasks: BackgroundTasks,
     q: OAuth2PasswordRequestForm = Depends(),
 ) -> LoginPostResponse:
     account: m.Account | None = (
@@ -109,6 +115,11 @@ async def _(
             code=fastapi_utils.LogicErrorCodeEnum.WrongPassword
         )
 
+    if auth_utils.password_needs_rehash(account.password):
+        background_tasks.add_task(
+            _rehash_password, account.id, q.password, account.password
+        )
+
     account_login = m.AccountLogin(
         ipaddr=fastapi_utils.get_client_ip(request),
         account_id=account.id,
@@ -125,3 +136,21 @@ async def _(
             account_login.id,
         ),
     )
+
+
+async def _rehash_password(
+    account_id: uuid.UUID, password: str, hashed_password: str
+) -> None:
+    try:
+        rehashed_password = await auth_utils.generate_hashed_password(password)
+    except fastapi_utils.ServiceUnavailableError:
+        # try again on the next login
+        return
+
+    # NOTE : skipped if the password has been changed in between
+    await AppCtx.current.db.session.execute(
+        sa_exp.update(m.Account)
+        .where(m.Account.id == account_id, m.Account.password == hashed_password)
+        .values(password=rehashed_password)
+    )
+    await AppCtx.current.db.session.commit()
@@ -1,17 +1,84 @@
 import datetime
 import uuid
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from fastapi import Depends
 import sqlalchemy.exc
 from app.ctx import AppCtx
 from sqlalchemy.sql import expression as sa_exp
 from app.utils import fastapi as fastapi_utils
 from app.utils import auth as auth_utils
+from app.utils import sqla as sqla_utils
 from app.models import orm as m
 
 router = fastapi_utils.CustomAPIRouter(prefix="/daily/log", tags=["daily_log"])
 
 
+class _DailyLogIdByDateCache(sqla_utils.NotifiedCache):
+    """`DailyLog.id` of a single date, which is the today's one in practice.
+
+    A missing log is cached as well, so polling before the log is created does
+    not hit DB either. Changing the date is a cache miss.
+    """
+
+    channel = "daily_log_created"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._date: datetime.date | None = None
+        self._daily_log_id: uuid.UUID | None = None
+
+    def get(self, date: datetime.date) -> tuple[bool, uuid.UUID | None]:
+        if not self.is_listening or date != self._date:
+            return False, None
+        return True, self._daily_log_id
+
+    def put_loaded(
+        self,
+        date: datetime.date,
+        daily_log_id: uuid.UUID | None,
+        loaded_version: int,
+    ) -> None:
+        # skip if a log is created while loading
+        if self.is_listening and loaded_version == self.version:
+            self._date, self._daily_log_id = date, daily_log_id
+
+    def put_created(self, date: datetime.date, daily_log_id: uuid.UUID) -> None:
+        self.version += 1
+        self._date, self._daily_log_id = date, daily_log_id
+
+    def on_notify(self, payload: str) -> None:
+        date_iso, daily_log_id_hex = payload.split("|")
+        self.put_created(
+            datetime.date.fromisoformat(date_iso), uuid.UUID(daily_log_id_hex)
+        )
+
+    def reset(self) -> None:
+        super().reset()
+        self._date, self._daily_log_id = None, None
+
+
+_daily_log_id_by_date_cache = _DailyLogIdByDateCache()
+sqla_utils.register_notified_cache(_daily_log_id_by_date_cache)
+
+
+async def notify_created_daily_logs(
+    daily_logs: list[tuple[datetime.date, uuid.UUID]]
+) -> None:
+    """Bumps the version of the daily logs for the daily logs created in the
+    current transaction, and lets every worker know them when it is committed.
+    The latest date is cached in the end.
+    """
+    await sqla_utils.bump_table_version(m.DailyLog.__tablename__)
+
+    await sqla_utils.notify_many(
+        _daily_log_id_by_date_cache.channel,
+        [
+            f"{date.isoformat()}|{daily_log_id.hex}"
+            for date, daily_log_id in sorted(daily_logs)
+        ],
+    )
+
+
 class DailyGetAndListResponse(BaseModel):
     id: uuid.UUID
     date: datetime.date
@@ -21,12 +88,12 @@ class DailyGetAndListResponse(BaseModel):
     "GET",
     "",
     error_codes=[],
+    etag=sqla_utils.table_version_etag(m.DailyLog.__tablename__),
+    trusted_output=True,
 )
 async def daily_log_list() -> list[DailyGetAndListResponse]:
-    daily_log_list = (
-        (await AppCtx.current.db.session.execute(sa_exp.select(m.DailyLog)))
-        .scalars()
-        .all()
+    daily_log_list = await sqla_utils.read_rows(
+        sa_exp.select(m.DailyLog.id, m.DailyLog.date)
     )
 
     return [
@@ -38,6 +105,72 @@ async def daily_log_list() -> list[DailyGetAndListResponse]:
     ]
 
 
+class DailyLogDetailPerformanceLogResponse(BaseModel):
+    id: uuid.UUID
+    count: int
+    weight: int
+    exercise_category_id: uuid.UUID
+    exercise_category_name: str
+
+
+class DailyLogDetailResponse(BaseModel):
+    id: uuid.UUID
+    date: datetime.date
+    performance_logs: list[DailyLogDetailPerformanceLogResponse] = Field(
+        description="The logs of the day, in the order they were created",
+    )
+
+
+@router.api_wrapper(
+    "GET",
+    "/:id/detail",
+    error_codes=[fastapi_utils.LogicErrorCodeEnum.ModelNotFound],
+    trusted_output=True,
+)
+async def daily_log_detail_get(id: uuid.UUID) -> DailyLogDetailResponse:
+    # NOTE : a single round trip, with the logs found by their
+    #        `(daily_log_id, created)` index. A day without logs is one row of
+    #        nulls by the outer joins.
+    rows = (
+        await AppCtx.current.db.session.execute(
+            sa_exp.select(
+                m.DailyLog.date,
+                m.PerformanceLog.id,
+                m.PerformanceLog.count,
+                m.PerformanceLog.weight,
+                m.PerformanceLog.exercise_category_id,
+                m.ExerciseCategory.name,
+            )
+            .outerjoin(m.PerformanceLog, m.PerformanceLog.daily_log_id == m.DailyLog.id)
+            .outerjoin(
+                m.ExerciseCategory,
+                m.ExerciseCategory.id == m.PerformanceLog.exercise_category_id,
+            )
+            .where(m.DailyLog.id == id)
+            .order_by(m.PerformanceLog.created.asc(), m.PerformanceLog.id.asc())
+        )
+    ).all()
+
+    if not rows:
+        raise fastapi_utils.LogicError(fastapi_utils.LogicErrorCodeEnum.ModelNotFound)
+
+    return DailyLogDetailResponse(
+        id=id,
+        date=rows[0].date,
+        performance_logs=[
+            DailyLogDetailPerformanceLogResponse(
+                id=row.id,
+                count=row.count,
+                weight=row.weight,
+                exercise_category_id=row.exercise_category_id,
+                exercise_category_name=row.name,
+            )
+            for row in rows
+            if row.id is not None
+        ],
+    )
+
+
 class DailyLogTodayResponse(BaseModel):
     id: uuid.UUID | None
 
@@ -46,11 +179,19 @@ class DailyLogTodayResponse(BaseModel):
 async def daily_log_today_get() -> DailyLogTodayResponse:
     today_date = datetime.datetime.now().date()
 
-    today_daily_log_id = (
-        await AppCtx.current.db.session.execute(
-            sa_exp.select(m.DailyLog.id).where(m.DailyLog.date == today_date)
+    is_cached, today_daily_log_id = _daily_log_id_by_date_cache.get(today_date)
+    if not is_cached:
+        loaded_version = _daily_log_id_by_date_cache.version
+
+        today_daily_log_id = (
+            await AppCtx.current.db.session.execute(
+                sa_exp.select(m.DailyLog.id).where(m.DailyLog.date == today_date)
+            )
+        ).scalar()
+
+        _daily_log_id_by_date_cache.put_loaded(
+            today_date, today_daily_log_id, loaded_version
         )
-    ).scalar()
 
     return DailyLogTodayResponse(id=today_daily_log_id)
 
@@ -83,10 +224,22 @@ async def daily_log_post() -> DailyLogPostResponse:
     AppCtx.current.db.session.add(daily_log)
 
     try:
+        await AppCtx.current.db.session.flush()
+
+        await sqla_utils.bump_table_version(m.DailyLog.__tablename__)
+
+        # let the other workers know on commit
+        await sqla_utils.notify(
+            _daily_log_id_by_date_cache.channel,
+            f"{daily_log.date.isoformat()}|{daily_log.id.hex}",
+        )
+
         await AppCtx.current.db.session.commit()
     except sqlalchemy.exc.IntegrityError:
         raise fastapi_utils.LogicError(
             code=fastapi_utils.LogicErrorCodeEnum.RaceCondition
         )
 
+    _daily_log_id_by_date_cache.put_created(daily_log.date, daily_log.id)
+
     return DailyLogPostResponse(id=daily_log.id)
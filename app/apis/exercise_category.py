@@ -1,9 +1,12 @@
+import datetime
 import uuid
+from typing import NamedTuple
 from pydantic import BaseModel
 from fastapi import Depends
 from app.ctx import AppCtx
 from app.utils import fastapi as fastapi_utils
 from app.utils import auth as auth_utils
+from app.utils import sqla as sqla_utils
 from sqlalchemy.sql import expression as sa_exp
 from app.models import orm as m
 
@@ -12,6 +15,173 @@ router = fastapi_utils.CustomAPIRouter(
 )
 
 
+class _CatalogItem(NamedTuple):
+    id: uuid.UUID
+    name: str
+    created: datetime.datetime
+
+
+class _ExerciseCategoryCatalog(sqla_utils.NotifiedCache):
+    """Per-worker copy of the whole `exercise_category` table.
+
+    Writes of this worker are applied right after their commit. Writes of the
+    other workers are announced with their `CatalogVersion`, which makes the
+    catalog reload on the next read.
+    """
+
+    channel = "exercise_category_catalog"
+
+    def __init__(self) -> None:
+        super().__init__()
+        # `None` if the catalog has to be (re)loaded
+        self._catalog_version: int | None = None
+        # `CatalogVersion` read with the items, which may be newer than it
+        self._loaded_catalog_version = 0
+        self._own_catalog_versions: set[int] = set()
+
+        self._items: dict[uuid.UUID, _CatalogItem] = {}
+        self._sorted_items: list[_CatalogItem] | None = None
+
+    async def load_if_stale(self) -> None:
+        if self.is_listening and self._catalog_version is not None:
+            return
+
+        loaded_version = self.version
+
+        # NOTE : read the version first, so that a change committed in
+        #        between can only make the catalog newer than its version.
+        catalog_version = (
+            await AppCtx.current.db.session.execute(
+                sa_exp.select(m.CatalogVersion.version).where(
+                    m.CatalogVersion.name == self.channel
+                )
+            )
+        ).scalar() or 0
+
+        rows = await sqla_utils.read_rows(
+            sa_exp.select(
+                m.ExerciseCategory.id,
+                m.ExerciseCategory.name,
+                m.ExerciseCategory.created,
+            )
+        )
+
+        self._items = {row.id: _CatalogItem(*row) for row in rows}
+        self._sorted_items = None
+        self._loaded_catalog_version = catalog_version
+
+        if self.is_listening and loaded_version == self.version:
+            self._catalog_version = catalog_version
+
+    def loaded_catalog_version(self) -> int:
+        """`CatalogVersion` of the items in memory. Must be loaded."""
+        if self._catalog_version is not None:
+            return self._catalog_version
+        return self._loaded_catalog_version
+
+    def get(self, exercise_category_id: uuid.UUID) -> _CatalogItem | None:
+        return self._items.get(exercise_category_id)
+
+    def list_by_created_desc(self) -> list[_CatalogItem]:
+        if self._sorted_items is None:
+            self._sorted_items = sorted(
+                self._items.values(), key=lambda item: item.created, reverse=True
+            )
+        return self._sorted_items
+
+    def expect_own_notification(self, catalog_version: int) -> None:
+        self._own_catalog_versions.add(catalog_version)
+
+    def forget_own_notification(self, catalog_version: int) -> None:
+        self._own_catalog_versions.discard(catalog_version)
+
+    def apply_committed(
+        self,
+        catalog_version: int,
+        changes: dict[uuid.UUID, _CatalogItem | None],
+    ) -> None:
+        self.forget_own_notification(catalog_version)
+
+        if (
+            self._catalog_version is None
+            or catalog_version != self._catalog_version + 1
+        ):
+            # missed a change of another worker
+            self.reset()
+            return
+
+        self.version += 1
+        self._catalog_version = catalog_version
+
+        for exercise_category_id, item in changes.items():
+            if item is None:
+                self._items.pop(exercise_category_id, None)
+            else:
+                self._items[exercise_category_id] = item
+        self._sorted_items = None
+
+    def on_notify(self, payload: str) -> None:
+        catalog_version = int(payload)
+
+        if catalog_version in self._own_catalog_versions:
+            return
+        if self._catalog_version is not None and (
+            catalog_version <= self._catalog_version
+        ):
+            return
+
+        self.reset()
+
+    def reset(self) -> None:
+        super().reset()
+        self._catalog_version = None
+
+
+_exercise_category_catalog = _ExerciseCategoryCatalog()
+sqla_utils.register_notified_cache(_exercise_category_catalog)
+
+
+async def _commit_catalog_changes(
+    changes: dict[uuid.UUID, _CatalogItem | None],
+) -> None:
+    catalog_version = await sqla_utils.bump_table_version(
+        _exercise_category_catalog.channel
+    )
+
+    await sqla_utils.notify(_exercise_category_catalog.channel, str(catalog_version))
+
+    _exercise_category_catalog.expect_own_notification(catalog_version)
+    try:
+        await AppCtx.current.db.session.commit()
+    except BaseException:
+        _exercise_category_catalog.forget_own_notification(catalog_version)
+        raise
+
+    _exercise_category_catalog.apply_committed(catalog_version, changes)
+
+
+async def commit_created_exercise_categories(
+    exercise_categories: list[m.ExerciseCategory],
+) -> None:
+    """Commits the current transaction, which created the flushed categories,
+    and applies them to the catalog of every worker.
+    """
+    await _commit_catalog_changes(
+        {
+            exercise_category.id: _CatalogItem(
+                exercise_category.id, exercise_category.name, exercise_category.created
+            )
+            for exercise_category in exercise_categories
+        }
+    )
+
+
+async def _catalog_etag() -> str:
+    # NOTE : no DB access while the catalog is up to date
+    await _exercise_category_catalog.load_if_stale()
+    return str(_exercise_category_catalog.loaded_catalog_version())
+
+
 class ExerciseLogGetAndListResponse(BaseModel):
     id: uuid.UUID
     name: str
@@ -21,11 +191,9 @@ class ExerciseLogGetAndListResponse(BaseModel):
 async def exercise_category_get(
     id: uuid.UUID,
 ) -> ExerciseLogGetAndListResponse:
-    exercise_category = (
-        await AppCtx.current.db.session.execute(
-            sa_exp.select(m.ExerciseCategory).where(m.ExerciseCategory.id == id)
-        )
-    ).scalar_one_or_none()
+    await _exercise_category_catalog.load_if_stale()
+
+    exercise_category = _exercise_category_catalog.get(id)
 
     if exercise_category is None:
         raise fastapi_utils.LogicError(fastapi_utils.LogicErrorCodeEnum.ModelNotFound)
@@ -35,19 +203,17 @@ async def exercise_category_get(
     )
 
 
-@router.api_wrapper("GET", "", error_codes=[])
+@router.api_wrapper(
+    "GET",
+    "",
+    error_codes=[],
+    etag=_catalog_etag,
+    trusted_output=True,
+)
 async def exercise_category_list() -> list[ExerciseLogGetAndListResponse]:
-    exercise_category_query = sa_exp.select(m.ExerciseCategory)
-
-    exercise_category_query = exercise_category_query.order_by(
-        m.ExerciseCategory.created.desc()
-    )
+    await _exercise_category_catalog.load_if_stale()
 
-    exercise_category_list = (
-        (await AppCtx.current.db.session.execute(exercise_category_query))
-        .scalars()
-        .all()
-    )
+    exercise_category_list = _exercise_category_catalog.list_by_created_desc()
 
     return [
         ExerciseLogGetAndListResponse(
@@ -79,7 +245,15 @@ async def exercise_category_post(
 
     AppCtx.current.db.session.add(exercise_category)
 
-    await AppCtx.current.db.session.commit()
+    await AppCtx.current.db.session.flush()
+
+    await _commit_catalog_changes(
+        {
+            exercise_category.id: _CatalogItem(
+                exercise_category.id, exercise_category.name, exercise_category.created
+            )
+        }
+    )
 
     return ExerciseLogPostResponse(id=exercise_category.id)
 
@@ -111,11 +285,21 @@ async def exercise_category_patch(
     if exercise_category is None:
         raise fastapi_utils.LogicError(fastapi_utils.LogicErrorCodeEnum.ModelNotFound)
 
-    exercise_category.name = q.name
+    for key, value in q.__dict__.items():
+        if value is not None:
+            setattr(exercise_category, key, value)
 
     AppCtx.current.db.session.add(exercise_category)
 
-    await AppCtx.current.db.session.commit()
+    # the catalog takes the values of the row, not the ones of the request
+    await AppCtx.current.db.session.flush()
+    await _commit_catalog_changes(
+        {
+            exercise_category.id: _CatalogItem(
+                exercise_category.id, exercise_category.name, exercise_category.created
+            )
+        }
+    )
 
     return ExerciseLogPatchResponse(
         id=exercise_category.id, name=exercise_category.name
@@ -139,8 +323,18 @@ async def exercise_category_delete(
     if exercise_category is None:
         raise fastapi_utils.LogicError(fastapi_utils.LogicErrorCodeEnum.ModelNotFound)
 
+    # rollups emptied by deletions of the logs are kept until here
+    await AppCtx.current.db.session.execute(
+        sa_exp.delete(m.PerformanceRollup).where(
+            m.PerformanceRollup.exercise_category_id == id,
+            m.PerformanceRollup.set_count == 0,
+        )
+    )
+
     await AppCtx.current.db.session.delete(exercise_category)
 
-    await AppCtx.current.db.session.commit()
+    await AppCtx.current.db.session.flush()
+
+    await _commit_catalog_changes({exercise_category.id: None})
 
     return fastapi_utils.DefaultResponse()
@@ -25,3 +25,14 @@ async def _() -> PingGetResponse:
         return PingGetResponse(okay=False)
     else:
         return PingGetResponse(okay=True)
+
+
+class MetricsGetResponse(BaseModel):
+    password_hashing: dict[str, int | float]
+
+
+@router.get("/_metrics", response_model=MetricsGetResponse)
+async def _() -> MetricsGetResponse:
+    return MetricsGetResponse(
+        password_hashing=AppCtx.current.password_hasher.stats(),
+    )
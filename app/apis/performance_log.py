@@ -1,11 +1,30 @@
+import asyncio
+import csv
+import dataclasses
+import datetime
+import io
+import json
+import logging
 import uuid
-from pydantic import BaseModel
-from fastapi import Depends
+from typing import Any, AsyncIterator, Literal, cast
+from pydantic import BaseModel, Field
+from fastapi import Depends, UploadFile
+from fastapi.responses import StreamingResponse
+import sqlalchemy.exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.schema import Table
 from app.ctx import AppCtx
 from app.utils import fastapi as fastapi_utils
 from app.utils import auth as auth_utils
+from app.utils import sqla as sqla_utils
+from sqlalchemy import func as sa_func
+from sqlalchemy import types as sa_types
+from sqlalchemy.dialects import postgresql as pg_dialect
 from sqlalchemy.sql import expression as sa_exp
 from app.models import orm as m
+from app.apis import daily_log, exercise_category, performance_rollup, personal_record
+
+logger = logging.getLogger(__name__)
 
 router = fastapi_utils.CustomAPIRouter(
     prefix="/performance/log", tags=["performance_log"]
@@ -38,27 +57,586 @@ async def performance_log_get(
     )
 
 
-@router.api_wrapper("GET", "", error_codes=[])
-async def performance_log_list() -> list[PerformanceLogGetAndListResponse]:
-    performance_log_query = sa_exp.select(m.PerformanceLog)
+class PerformanceLogListRequest(BaseModel):
+    cursor: str | None = Field(
+        default=None,
+        description="The `next_cursor` of the previous page. If omitted, start over.",
+    )
+    limit: int = Field(
+        default=100,
+        description="The maximum number of returned objects",
+        ge=1,
+        le=1_000,
+    )
+    daily_log_id: uuid.UUID | None = Field(
+        default=None,
+        description="If set, only the logs of this daily log.",
+    )
+    exercise_category_id: uuid.UUID | None = Field(
+        default=None,
+        description="If set, only the logs of this exercise category.",
+    )
+    since: datetime.date | None = Field(
+        default=None,
+        description="If set, only the logs of daily logs on or after it.",
+    )
+    until: datetime.date | None = Field(
+        default=None,
+        description="If set, only the logs of daily logs on or before it.",
+    )
+
+
+class PerformanceLogListResponse(BaseModel):
+    items: list[PerformanceLogGetAndListResponse]
+    next_cursor: str | None = Field(
+        description="Cursor for the next page. `null` if this is the last page.",
+    )
+
+
+@router.api_wrapper(
+    "GET",
+    "",
+    error_codes=[fastapi_utils.LogicErrorCodeEnum.InvalidCursor],
+    etag=sqla_utils.table_version_etag(m.PerformanceLog.__tablename__),
+    trusted_output=True,
+)
+async def performance_log_list(
+    q: PerformanceLogListRequest = Depends(),
+) -> PerformanceLogListResponse:
+    performance_log_query = sa_exp.select(
+        m.PerformanceLog.id,
+        m.PerformanceLog.count,
+        m.PerformanceLog.weight,
+        m.PerformanceLog.created,
+    )
+
+    # NOTE : each parent filter is on the leading column of an index ending
+    #        with `created`, so that the pages are read in the order of the
+    #        index. The date range below is not : it spans several daily logs,
+    #        so their rows are found by that index but sorted afterwards.
+    if q.daily_log_id is not None:
+        performance_log_query = performance_log_query.where(
+            m.PerformanceLog.daily_log_id == q.daily_log_id
+        )
+    if q.exercise_category_id is not None:
+        performance_log_query = performance_log_query.where(
+            m.PerformanceLog.exercise_category_id == q.exercise_category_id
+        )
+    if q.since is not None or q.until is not None:
+        # the daily logs in the range are found by their date index first
+        daily_log_query = sa_exp.select(m.DailyLog.id)
+        if q.since is not None:
+            daily_log_query = daily_log_query.where(m.DailyLog.date >= q.since)
+        if q.until is not None:
+            daily_log_query = daily_log_query.where(m.DailyLog.date <= q.until)
+
+        performance_log_query = performance_log_query.where(
+            m.PerformanceLog.daily_log_id.in_(daily_log_query)
+        )
+
+    if q.cursor is not None:
+        try:
+            cursor = sqla_utils.decode_keyset_cursor(q.cursor)
+        except ValueError:
+            raise fastapi_utils.LogicError(
+                fastapi_utils.LogicErrorCodeEnum.InvalidCursor
+            )
+
+        performance_log_query = performance_log_query.where(
+            sqla_utils.keyset_after(
+                m.PerformanceLog.created, m.PerformanceLog.id, cursor
+            )
+        )
 
     performance_log_query = performance_log_query.order_by(
-        m.PerformanceLog.created.asc()
+        m.PerformanceLog.created.asc(), m.PerformanceLog.id.asc()
+    ).limit(q.limit + 1)
+
+    performance_log_list = await sqla_utils.read_rows(performance_log_query)
+
+    next_cursor = None
+    if len(performance_log_list) > q.limit:
+        performance_log_list = performance_log_list[: q.limit]
+        next_cursor = sqla_utils.encode_keyset_cursor(
+            performance_log_list[-1].created, performance_log_list[-1].id
+        )
+
+    return PerformanceLogListResponse(
+        items=[
+            PerformanceLogGetAndListResponse(
+                id=performance_log.id,
+                count=performance_log.count,
+                weight=performance_log.weight,
+            )
+            for performance_log in performance_log_list
+        ],
+        next_cursor=next_cursor,
+    )
+
+
+def _lttb_indices(xs: list[float], ys: list[float], threshold: int) -> list[int]:
+    """Indices of the points kept by Largest-Triangle-Three-Buckets.
+
+    The first and the last points are always kept. Each bucket in between
+    keeps the point making the largest triangle with the point kept in the
+    previous bucket and the average point of the next bucket.
+    """
+    if threshold >= len(xs) or threshold < 3:
+        return list(range(len(xs)))
+
+    bucket_size = (len(xs) - 2) / (threshold - 2)
+
+    kept = [0]
+    for bucket_index in range(threshold - 2):
+        start = int(bucket_index * bucket_size) + 1
+        end = int((bucket_index + 1) * bucket_size) + 1
+
+        next_start, next_end = end, min(
+            int((bucket_index + 2) * bucket_size) + 1, len(xs)
+        )
+        next_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        next_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        prev_x, prev_y = xs[kept[-1]], ys[kept[-1]]
+        kept.append(
+            max(
+                range(start, end),
+                key=lambda i: abs(
+                    (prev_x - next_x) * (ys[i] - prev_y)
+                    - (prev_x - xs[i]) * (next_y - prev_y)
+                ),
+            )
+        )
+    kept.append(len(xs) - 1)
+
+    return kept
+
+
+class PerformanceLogSeriesRequest(BaseModel):
+    exercise_category_id: uuid.UUID
+    points: int = Field(
+        default=200,
+        description="The maximum number of returned points",
+        ge=3,
+        le=1_000,
+    )
+    bucket: Literal["day", "week", "month"] = Field(
+        default="day",
+        description="The period of `daily_log.date` summed into one point",
     )
 
-    performance_log_list = (
-        (await AppCtx.current.db.session.execute(performance_log_query)).scalars().all()
+
+class PerformanceLogSeriesResponse(BaseModel):
+    dates: list[datetime.date] = Field(
+        description="The first day of each point's period, in ascending order",
     )
+    volumes: list[int] = Field(description="Sum of `weight * count` of each point")
+    max_weights: list[int] = Field(description="The heaviest weight of each point")
+
 
-    return [
-        PerformanceLogGetAndListResponse(
-            id=performance_log.id,
-            count=performance_log.count,
-            weight=performance_log.weight,
+@router.api_wrapper(
+    "GET",
+    "/series",
+    error_codes=[],
+)
+async def performance_log_series(
+    q: PerformanceLogSeriesRequest = Depends(),
+) -> PerformanceLogSeriesResponse:
+    bucket_date = sa_exp.cast(
+        sa_func.date_trunc(q.bucket, sa_exp.cast(m.DailyLog.date, sa_types.DateTime)),
+        sa_types.Date,
+    )
+
+    rows = (
+        await AppCtx.current.db.session.execute(
+            sa_exp.select(
+                bucket_date,
+                sa_exp.cast(
+                    sa_func.sum(
+                        sa_exp.cast(m.PerformanceLog.weight, sa_types.BigInteger)
+                        * m.PerformanceLog.count
+                    ),
+                    sa_types.BigInteger,
+                ),
+                sa_func.max(m.PerformanceLog.weight),
+            )
+            .join_from(
+                m.PerformanceLog,
+                m.DailyLog,
+                m.PerformanceLog.daily_log_id == m.DailyLog.id,
+            )
+            .where(m.PerformanceLog.exercise_category_id == q.exercise_category_id)
+            .group_by(bucket_date)
+            .order_by(bucket_date)
         )
-        for performance_log in performance_log_list
+    ).all()
+
+    kept_indices = _lttb_indices(
+        [row[0].toordinal() for row in rows],
+        [row[1] for row in rows],
+        q.points,
+    )
+
+    return PerformanceLogSeriesResponse(
+        dates=[rows[i][0] for i in kept_indices],
+        volumes=[rows[i][1] for i in kept_indices],
+        max_weights=[rows[i][2] for i in kept_indices],
+    )
+
+
+_EXPORT_CHUNK_SIZE = 1_000
+
+_EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+_EXPORT_FIELDS = (
+    "id",
+    "created",
+    "daily_log_id",
+    "exercise_category_id",
+    "weight",
+    "count",
+)
+
+
+class PerformanceLogExportRequest(BaseModel):
+    format: Literal["ndjson", "csv"] = Field(
+        default="ndjson",
+        description="The serialization format of exported rows",
+    )
+
+
+@router.api_wrapper(
+    "GET",
+    "/export",
+    error_codes=[],
+    response_class=StreamingResponse,
+)
+async def performance_log_export(
+    q: PerformanceLogExportRequest = Depends(),
+) -> StreamingResponse:
+    # NOTE : rows are streamed from a dedicated connection which lives as
+    #        long as the body iterator, not from the scoped session.
+    return StreamingResponse(
+        _iter_export_chunks(AppCtx.current.db.engine, q.format),
+        media_type=_EXPORT_MEDIA_TYPES[q.format],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="performance_log.{q.format}"'
+            ),
+        },
+    )
+
+
+async def _iter_export_chunks(
+    engine: AsyncEngine,
+    format_: Literal["ndjson", "csv"],
+) -> AsyncIterator[str]:
+    export_query = (
+        sa_exp.select(*[getattr(m.PerformanceLog, field) for field in _EXPORT_FIELDS])
+        .order_by(m.PerformanceLog.created.asc(), m.PerformanceLog.id.asc())
+        .execution_options(yield_per=_EXPORT_CHUNK_SIZE)
+    )
+
+    async with engine.connect() as conn:
+        export_result = await conn.stream(export_query)
+
+        if format_ == "csv":
+            yield ",".join(_EXPORT_FIELDS) + "\r\n"
+
+        async for rows in export_result.partitions():
+            chunk = io.StringIO()
+
+            if format_ == "csv":
+                csv.writer(chunk).writerows(
+                    (
+                        row.id,
+                        row.created.isoformat(),
+                        row.daily_log_id,
+                        row.exercise_category_id,
+                        row.weight,
+                        row.count,
+                    )
+                    for row in rows
+                )
+            else:
+                for row in rows:
+                    chunk.write(
+                        json.dumps(
+                            {
+                                "id": str(row.id),
+                                "created": row.created.isoformat(),
+                                "daily_log_id": str(row.daily_log_id),
+                                "exercise_category_id": str(row.exercise_category_id),
+                                "weight": row.weight,
+                                "count": row.count,
+                            }
+                        )
+                    )
+                    chunk.write("\n")
+
+            yield chunk.getvalue()
+
+
+_IMPORT_FIELDS = ("date", "exercise_category", "weight", "count")
+_IMPORT_COPY_COLUMNS = (
+    "id",
+    "weight",
+    "count",
+    "exercise_category_id",
+    "daily_log_id",
+    "created",
+)
+_IMPORT_COPY_CHUNK_SIZE = 50_000
+_IMPORT_MAX_REPORTED_REJECTS = 1_000
+
+_INT4_MIN, _INT4_MAX = -(2**31), 2**31 - 1
+
+
+# NOTE : not a `NamedTuple`, whose `count` field would shadow `tuple.count`
+@dataclasses.dataclass(frozen=True)
+class _ImportRow:
+    date: datetime.date
+    exercise_category_name: str
+    weight: int
+    count: int
+
+
+def _parse_import_csv(content: bytes) -> tuple[list[_ImportRow], list[dict[str, Any]]]:
+    reader = csv.reader(io.StringIO(content.decode("utf-8-sig")))
+
+    header = next(reader, None)
+    if header is None or [field.strip() for field in header] != list(_IMPORT_FIELDS):
+        raise ValueError("invalid header")
+
+    import_rows: list[_ImportRow] = []
+    rejects: list[dict[str, Any]] = []
+
+    for line_number, fields in enumerate(reader, start=2):
+        if not fields:
+            continue
+
+        try:
+            if len(fields) != len(_IMPORT_FIELDS):
+                raise ValueError(f"expected {len(_IMPORT_FIELDS)} fields")
+
+            date_iso, exercise_category_name, weight, count = fields
+            import_row = _ImportRow(
+                datetime.date.fromisoformat(date_iso.strip()),
+                exercise_category_name.strip(),
+                int(weight),
+                int(count),
+            )
+
+            if not import_row.exercise_category_name:
+                raise ValueError("empty exercise_category")
+            if not (
+                _INT4_MIN <= import_row.weight <= _INT4_MAX
+                and _INT4_MIN <= import_row.count <= _INT4_MAX
+            ):
+                raise ValueError("weight or count out of range")
+        except ValueError as err:
+            rejects.append({"line": line_number, "reason": str(err)})
+            continue
+
+        import_rows.append(import_row)
+
+    return import_rows, rejects
+
+
+@router.api_wrapper(
+    "POST",
+    "/import",
+    error_codes=[fastapi_utils.LogicErrorCodeEnum.InvalidImportFile],
+    response_class=StreamingResponse,
+)
+async def performance_log_import(file: UploadFile) -> StreamingResponse:
+    """
+    Imports a CSV of `date,exercise_category,weight,count` rows, creating the
+    missing daily logs and exercise categories by date and by name.
+
+    Progress is streamed as NDJSON: `parsed` with the rejected rows, `parents`,
+    `copying` per chunk, and `done` or `failed` in the end. Nothing is imported
+    unless `done` is sent.
+    """
+    content = await file.read()
+
+    try:
+        import_rows, rejects = await asyncio.get_running_loop().run_in_executor(
+            None, _parse_import_csv, content
+        )
+    except ValueError:
+        raise fastapi_utils.LogicError(
+            fastapi_utils.LogicErrorCodeEnum.InvalidImportFile
+        )
+
+    # NOTE : the import runs in the scoped session created again on its first
+    #        use in the body iterator, which is still in the `AppCtx` scope.
+    return StreamingResponse(
+        _iter_import_progress(import_rows, rejects),
+        media_type="application/x-ndjson",
+    )
+
+
+def _progress_line(**fields: Any) -> str:
+    return json.dumps(fields) + "\n"
+
+
+async def _iter_import_progress(
+    import_rows: list[_ImportRow],
+    rejects: list[dict[str, Any]],
+) -> AsyncIterator[str]:
+    yield _progress_line(
+        stage="parsed",
+        rows=len(import_rows),
+        rejected=len(rejects),
+        rejects=rejects[:_IMPORT_MAX_REPORTED_REJECTS],
+    )
+
+    if not import_rows:
+        yield _progress_line(stage="done", created=0)
+        return
+
+    try:
+        daily_log_ids, created_daily_logs = await _ensure_import_daily_logs(
+            {import_row.date for import_row in import_rows}
+        )
+        (
+            exercise_category_ids,
+            created_exercise_categories,
+        ) = await _ensure_import_exercise_categories(
+            {import_row.exercise_category_name for import_row in import_rows}
+        )
+        yield _progress_line(
+            stage="parents",
+            created_daily_logs=len(created_daily_logs),
+            created_exercise_categories=len(created_exercise_categories),
+        )
+
+        # NOTE : ids are issued here to find the imported logs for the rollups
+        imported_at = datetime.datetime.now(datetime.timezone.utc)
+        performance_log_ids = [m.uuid7() for _ in import_rows]
+        records = [
+            (
+                performance_log_id,
+                import_row.weight,
+                import_row.count,
+                exercise_category_ids[import_row.exercise_category_name],
+                daily_log_ids[import_row.date],
+                imported_at,
+            )
+            for performance_log_id, import_row in zip(performance_log_ids, import_rows)
+        ]
+
+        # COPY on the connection of the session, within its transaction
+        driver_connection = (
+            await (await AppCtx.current.db.session.connection()).get_raw_connection()
+        ).driver_connection
+        if driver_connection is None:
+            raise RuntimeError("The connection of the session is closed")
+
+        for start in range(0, len(records), _IMPORT_COPY_CHUNK_SIZE):
+            end = min(start + _IMPORT_COPY_CHUNK_SIZE, len(records))
+            await driver_connection.copy_records_to_table(
+                m.PerformanceLog.__tablename__,
+                records=records[start:end],
+                columns=_IMPORT_COPY_COLUMNS,
+            )
+            yield _progress_line(stage="copying", copied=end, total=len(records))
+
+        imported_filter = m.PerformanceLog.id == sa_exp.any_(
+            sqla_utils.uuid_array(performance_log_ids)
+        )
+        await performance_rollup.add_to_rollups(imported_filter)
+        await personal_record.raise_records(imported_filter)
+
+        if created_daily_logs:
+            await daily_log.notify_created_daily_logs(created_daily_logs)
+        await sqla_utils.bump_table_version(m.PerformanceLog.__tablename__)
+
+        if created_exercise_categories:
+            await exercise_category.commit_created_exercise_categories(
+                created_exercise_categories
+            )
+        else:
+            await AppCtx.current.db.session.commit()
+    except Exception:
+        logger.exception("Failed to import performance logs")
+        await AppCtx.current.db.session.rollback()
+
+        yield _progress_line(stage="failed")
+        return
+
+    yield _progress_line(stage="done", created=len(records))
+
+
+async def _ensure_import_daily_logs(
+    dates: set[datetime.date],
+) -> tuple[dict[datetime.date, uuid.UUID], list[tuple[datetime.date, uuid.UUID]]]:
+    created_daily_logs = [
+        (row.date, row.id)
+        for row in (
+            await AppCtx.current.db.session.execute(
+                pg_dialect.insert(m.DailyLog)
+                .values([{"date": date} for date in sorted(dates)])
+                .on_conflict_do_nothing(index_elements=[m.DailyLog.date])
+                .returning(m.DailyLog.id, m.DailyLog.date)
+            )
+        ).all()
     ]
 
+    daily_log_ids = {
+        row.date: row.id
+        for row in (
+            await AppCtx.current.db.session.execute(
+                sa_exp.select(m.DailyLog.id, m.DailyLog.date).where(
+                    m.DailyLog.date
+                    == sa_exp.any_(
+                        sa_exp.literal(list(dates), pg_dialect.ARRAY(sa_types.Date))
+                    )
+                )
+            )
+        ).all()
+    }
+
+    return daily_log_ids, created_daily_logs
+
+
+async def _ensure_import_exercise_categories(
+    names: set[str],
+) -> tuple[dict[str, uuid.UUID], list[m.ExerciseCategory]]:
+    exercise_category_ids: dict[str, uuid.UUID] = {}
+    for row in (
+        await AppCtx.current.db.session.execute(
+            sa_exp.select(m.ExerciseCategory.id, m.ExerciseCategory.name).where(
+                m.ExerciseCategory.name
+                == sa_exp.any_(
+                    sa_exp.literal(list(names), pg_dialect.ARRAY(sa_types.String))
+                )
+            )
+            # names are not unique, so the oldest one is taken
+            .order_by(m.ExerciseCategory.created.asc())
+        )
+    ).all():
+        exercise_category_ids.setdefault(row.name, row.id)
+
+    created_exercise_categories = [
+        m.ExerciseCategory(name=name)
+        for name in sorted(names - exercise_category_ids.keys())
+    ]
+    if created_exercise_categories:
+        AppCtx.current.db.session.add_all(created_exercise_categories)
+        await AppCtx.current.db.session.flush()
+
+        for created_exercise_category in created_exercise_categories:
+            exercise_category_ids[
+                created_exercise_category.name
+            ] = created_exercise_category.id
+
+    return exercise_category_ids, created_exercise_categories
+
 
 class PerformanceLogPostRequest(BaseModel):
     count: int
@@ -74,43 +652,202 @@ class PerformanceLogPostResponse(BaseModel):
 @router.api_wrapper(
     "POST",
     "",
-    error_codes=[],
+    error_codes=[fastapi_utils.LogicErrorCodeEnum.ModelNotFound],
 )
 async def performance_log_post(
     q: PerformanceLogPostRequest,
 ) -> PerformanceLogPostResponse:
-    exercise_category = (
-        await AppCtx.current.db.session.execute(
-            sa_exp.select(m.ExerciseCategory).where(
-                m.ExerciseCategory.id == q.exercise_category_id
+    # NOTE : parents are not looked up in advance. The foreign key constraints
+    #        check them within the INSERT itself.
+    # on the table, as the CTEs added to a query of ORM entities are not rendered
+    performance_log_table = cast(Table, m.PerformanceLog.__table__)
+    created_performance_log = (
+        sa_exp.insert(performance_log_table)
+        .values(
+            # the defaults of the client are not issued for a nested `INSERT`
+            id=m.uuid7(),
+            count=q.count,
+            weight=q.weight,
+            exercise_category_id=q.exercise_category_id,
+            daily_log_id=q.daily_log_id,
+            created=sa_func.now(),
+        )
+        .returning(
+            performance_log_table.c.id,
+            performance_log_table.c.exercise_category_id,
+            performance_log_table.c.daily_log_id,
+            performance_log_table.c.weight,
+            performance_log_table.c.count,
+        )
+        .cte("created_performance_log")
+    )
+
+    # NOTE : the rollups, the records and the version of the table are written
+    #        by the same statement, which is atomic by itself. So it is sent
+    #        alone, without the round trips of `BEGIN` and `COMMIT`.
+    create_query = (
+        sa_exp.select(created_performance_log.c.id)
+        .add_cte(
+            performance_rollup.rollups_upsert(created_performance_log).cte(
+                "performance_rollup_upsert"
             )
         )
-    ).scalar_one_or_none()
+        .add_cte(
+            personal_record.records_upsert(created_performance_log).cte(
+                "personal_record_upsert"
+            )
+        )
+        .add_cte(
+            sqla_utils.table_version_bump(m.PerformanceLog.__tablename__).cte(
+                "catalog_version_bump"
+            )
+        )
+    )
 
-    if exercise_category is None:
-        raise fastapi_utils.LogicError(fastapi_utils.LogicErrorCodeEnum.ModelNotFound)
+    connection = await AppCtx.current.db.session.connection(
+        execution_options={"isolation_level": "AUTOCOMMIT"}  # type: ignore[arg-type]
+    )
 
-    daily_log = (
-        await AppCtx.current.db.session.execute(
-            sa_exp.select(m.DailyLog).where(m.DailyLog.id == q.daily_log_id)
+    try:
+        performance_log_id = (await connection.execute(create_query)).scalar_one()
+    except sqlalchemy.exc.IntegrityError as err:
+        missing_model = sqla_utils.find_missing_parent(err, m.PerformanceLog)
+        if missing_model is None:
+            raise
+
+        raise fastapi_utils.LogicError(
+            code=fastapi_utils.LogicErrorCodeEnum.ModelNotFound,
+            detail={missing_model: ["id"]},
         )
-    ).scalar_one_or_none()
 
-    if daily_log is None:
-        raise fastapi_utils.LogicError(fastapi_utils.LogicErrorCodeEnum.ModelNotFound)
+    return PerformanceLogPostResponse(id=performance_log_id)
+
 
-    performance_log = m.PerformanceLog(
-        count=q.count,
-        weight=q.weight,
-        exercise_category=exercise_category,
-        daily_log=daily_log,
+class PerformanceLogBatchPostRequest(BaseModel):
+    items: list[PerformanceLogPostRequest] = Field(
+        description="Performance logs to create at once",
+        min_items=1,
+        max_items=100,
     )
 
-    AppCtx.current.db.session.add(performance_log)
 
-    await AppCtx.current.db.session.commit()
+class PerformanceLogBatchPostItemResponse(BaseModel):
+    id: uuid.UUID | None = Field(
+        description="Created performance log's id. `null` if the item is rejected.",
+    )
+    code: fastapi_utils.LogicErrorCodeEnum | None = Field(
+        description="Why the item is rejected. `null` if the item is created.",
+    )
+    detail: dict[str, Any] | None
+
+
+class PerformanceLogBatchPostResponse(BaseModel):
+    items: list[PerformanceLogBatchPostItemResponse] = Field(
+        description="Results in the same order as the requested items",
+    )
 
-    return PerformanceLogPostResponse(id=performance_log.id)
+
+@router.api_wrapper(
+    "POST",
+    "/batch",
+    error_codes=[fastapi_utils.LogicErrorCodeEnum.ModelNotFound],
+)
+async def performance_log_batch_post(
+    q: PerformanceLogBatchPostRequest,
+) -> PerformanceLogBatchPostResponse:
+    existing_exercise_category_ids = set(
+        (
+            await AppCtx.current.db.session.execute(
+                sa_exp.select(m.ExerciseCategory.id).where(
+                    m.ExerciseCategory.id
+                    == sa_exp.any_(
+                        sqla_utils.uuid_array(
+                            {item.exercise_category_id for item in q.items}
+                        )
+                    )
+                )
+            )
+        ).scalars()
+    )
+
+    existing_daily_log_ids = set(
+        (
+            await AppCtx.current.db.session.execute(
+                sa_exp.select(m.DailyLog.id).where(
+                    m.DailyLog.id
+                    == sa_exp.any_(
+                        sqla_utils.uuid_array({item.daily_log_id for item in q.items})
+                    )
+                )
+            )
+        ).scalars()
+    )
+
+    result_items: list[PerformanceLogBatchPostItemResponse] = []
+    performance_log_rows: list[dict[str, Any]] = []
+
+    for item in q.items:
+        missing_models: dict[str, Any] = {}
+        if item.exercise_category_id not in existing_exercise_category_ids:
+            missing_models["ExerciseCategory"] = ["id"]
+        if item.daily_log_id not in existing_daily_log_ids:
+            missing_models["DailyLog"] = ["id"]
+
+        if missing_models:
+            result_items.append(
+                PerformanceLogBatchPostItemResponse(
+                    id=None,
+                    code=fastapi_utils.LogicErrorCodeEnum.ModelNotFound,
+                    detail=missing_models,
+                )
+            )
+            continue
+
+        # NOTE : ids are issued here so that they map back to the requested
+        #        order without relying on the row order of `RETURNING`.
+        performance_log_id = m.uuid7()
+        performance_log_rows.append(
+            {
+                "id": performance_log_id,
+                "count": item.count,
+                "weight": item.weight,
+                "exercise_category_id": item.exercise_category_id,
+                "daily_log_id": item.daily_log_id,
+            }
+        )
+        result_items.append(
+            PerformanceLogBatchPostItemResponse(
+                id=performance_log_id, code=None, detail=None
+            )
+        )
+
+    if performance_log_rows:
+        try:
+            await AppCtx.current.db.session.execute(
+                sa_exp.insert(m.PerformanceLog).values(performance_log_rows)
+            )
+        except sqlalchemy.exc.IntegrityError as err:
+            # NOTE : a parent deleted since the checks above fails the whole
+            #        INSERT, so no item of the batch is created.
+            missing_model = sqla_utils.find_missing_parent(err, m.PerformanceLog)
+            if missing_model is None:
+                raise
+
+            raise fastapi_utils.LogicError(
+                code=fastapi_utils.LogicErrorCodeEnum.ModelNotFound,
+                detail={missing_model: ["id"]},
+            )
+
+        created_filter = m.PerformanceLog.id == sa_exp.any_(
+            sqla_utils.uuid_array([row["id"] for row in performance_log_rows])
+        )
+        await performance_rollup.add_to_rollups(created_filter)
+        await personal_record.raise_records(created_filter)
+        await sqla_utils.bump_table_version(m.PerformanceLog.__tablename__)
+
+        await AppCtx.current.db.session.commit()
+
+    return PerformanceLogBatchPostResponse(items=result_items)
 
 
 class PerformanceLogPatchRequest(BaseModel):
@@ -135,19 +872,33 @@ async def performance_log_patch(
 ) -> PerformanceLogPatchResponse:
     performance_log = (
         await AppCtx.current.db.session.execute(
-            sa_exp.select(m.PerformanceLog).where(m.PerformanceLog.id == id)
+            sa_exp.select(m.PerformanceLog)
+            .where(m.PerformanceLog.id == id)
+            .with_for_update()
         )
     ).scalar_one_or_none()
 
     if performance_log is None:
         raise fastapi_utils.LogicError(fastapi_utils.LogicErrorCodeEnum.ModelNotFound)
 
+    # NOTE : before any change of the log, which would be autoflushed
+    await performance_rollup.add_to_rollups(m.PerformanceLog.id == id, sign=-1)
+    former_weight, former_count = performance_log.weight, performance_log.count
+
     for key, value in q.__dict__.items():
         if value is not None:
             setattr(performance_log, key, value)
 
     AppCtx.current.db.session.add(performance_log)
 
+    await AppCtx.current.db.session.flush()
+    await performance_rollup.add_to_rollups(m.PerformanceLog.id == id)
+    await personal_record.lower_records(
+        performance_log.exercise_category_id, former_weight, former_count
+    )
+    await personal_record.raise_records(m.PerformanceLog.id == id)
+    await sqla_utils.bump_table_version(m.PerformanceLog.__tablename__)
+
     await AppCtx.current.db.session.commit()
 
     return PerformanceLogPatchResponse(
@@ -167,15 +918,27 @@ async def performance_log_delete(
 ) -> fastapi_utils.DefaultResponse:
     performance_log = (
         await AppCtx.current.db.session.execute(
-            sa_exp.select(m.PerformanceLog).where(m.PerformanceLog.id == id)
+            sa_exp.select(m.PerformanceLog)
+            .where(m.PerformanceLog.id == id)
+            .with_for_update()
         )
     ).scalar_one_or_none()
 
     if performance_log is None:
         raise fastapi_utils.LogicError(fastapi_utils.LogicErrorCodeEnum.ModelNotFound)
 
+    await performance_rollup.add_to_rollups(m.PerformanceLog.id == id, sign=-1)
+
     await AppCtx.current.db.session.delete(performance_log)
 
+    await AppCtx.current.db.session.flush()
+    await personal_record.lower_records(
+        performance_log.exercise_category_id,
+        performance_log.weight,
+        performance_log.count,
+    )
+    await sqla_utils.bump_table_version(m.PerformanceLog.__tablename__)
+
     await AppCtx.current.db.session.commit()
 
     return fastapi_utils.DefaultResponse()
@@ -0,0 +1,214 @@
+import datetime
+import uuid
+from typing import Literal
+
+from fastapi import Depends
+from pydantic import BaseModel, Field
+from sqlalchemy import func as sa_func
+from sqlalchemy import types as sa_types
+from sqlalchemy.dialects import postgresql as pg_dialect
+from sqlalchemy.sql import expression as sa_exp
+from sqlalchemy.sql.dml import Insert
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.selectable import FromClause
+
+from app.ctx import AppCtx
+from app.models import orm as m
+from app.utils import fastapi as fastapi_utils
+
+router = fastapi_utils.CustomAPIRouter(
+    prefix="/performance/rollup", tags=["performance_rollup"]
+)
+
+_PERIODS = ("week", "month")
+
+
+def rollups_upsert(
+    performance_logs: FromClause,
+    performance_log_filter: ColumnElement[bool] | None = None,
+    sign: Literal[1, -1] = 1,
+) -> Insert:
+    """The upsert adding the given performance logs to their rollups, or
+    subtracting them if `sign` is -1.
+
+    `performance_logs` is the `performance_log` table, or a CTE of the rows
+    returned by the `INSERT` of the same statement.
+    """
+    periods = sa_exp.values(
+        sa_exp.column("period", sa_types.String), name="periods"
+    ).data([(period,) for period in _PERIODS])
+    period_start = sa_exp.cast(
+        sa_func.date_trunc(
+            periods.c.period, sa_exp.cast(m.DailyLog.date, sa_types.DateTime)
+        ),
+        sa_types.Date,
+    )
+
+    delta_query = (
+        sa_exp.select(
+            periods.c.period,
+            period_start,
+            performance_logs.c.exercise_category_id,
+            sa_func.sum(
+                sa_exp.cast(performance_logs.c.weight, sa_types.BigInteger)
+                * performance_logs.c.count
+            )
+            * sign,
+            sa_func.count() * sign,
+            sa_func.now(),
+        )
+        .join_from(
+            performance_logs,
+            m.DailyLog,
+            performance_logs.c.daily_log_id == m.DailyLog.id,
+        )
+        .join(periods, sa_exp.true())
+        .group_by(
+            periods.c.period,
+            period_start,
+            performance_logs.c.exercise_category_id,
+        )
+    )
+    if performance_log_filter is not None:
+        delta_query = delta_query.where(performance_log_filter)
+
+    insert_query = pg_dialect.insert(m.PerformanceRollup).from_select(
+        [
+            "period",
+            "period_start",
+            "exercise_category_id",
+            "volume",
+            "set_count",
+            # not the default of the client, which is named after the column
+            # and would clash with the other `INSERT`s of the same statement
+            "created",
+        ],
+        delta_query,
+    )
+
+    upsert_query: Insert = insert_query.on_conflict_do_update(
+        index_elements=[
+            m.PerformanceRollup.period,
+            m.PerformanceRollup.period_start,
+            m.PerformanceRollup.exercise_category_id,
+        ],
+        set_={
+            "volume": m.PerformanceRollup.volume + insert_query.excluded.volume,
+            "set_count": (
+                m.PerformanceRollup.set_count + insert_query.excluded.set_count
+            ),
+            "modified": sa_func.now(),
+        },
+    )
+    return upsert_query
+
+
+async def add_to_rollups(
+    performance_log_filter: ColumnElement[bool] | None,
+    sign: Literal[1, -1] = 1,
+) -> None:
+    """Adds the performance logs matching the filter to their rollups, or
+    subtracts them if `sign` is -1, in the current transaction.
+
+    Changed logs must be locked, so that concurrent changes of the same log
+    cannot be counted twice.
+    """
+    await AppCtx.current.db.session.execute(
+        rollups_upsert(m.PerformanceLog.__table__, performance_log_filter, sign)
+    )
+
+
+async def rebuild_rollups() -> None:
+    """Recomputes every rollup from `performance_log` and commits."""
+    # NOTE : blocks the changes of the logs until the rebuild is committed
+    await AppCtx.current.db.session.execute(
+        sa_exp.text("LOCK TABLE performance_log IN SHARE MODE")
+    )
+
+    await AppCtx.current.db.session.execute(sa_exp.delete(m.PerformanceRollup))
+    await add_to_rollups(None)
+
+    await AppCtx.current.db.session.commit()
+
+
+class PerformanceRollupListRequest(BaseModel):
+    period: Literal["week", "month"] = Field(description="The period of rollups")
+    since: datetime.date | None = Field(
+        default=None,
+        description="If set, only the periods starting on or after it.",
+    )
+    until: datetime.date | None = Field(
+        default=None,
+        description="If set, only the periods starting on or before it.",
+    )
+    exercise_category_id: uuid.UUID | None = Field(
+        default=None,
+        description="If set, only the rollups of this exercise category.",
+    )
+
+
+class PerformanceRollupListItemResponse(BaseModel):
+    period_start: datetime.date = Field(
+        description="The first day of the period. Weeks start on Monday."
+    )
+    exercise_category_id: uuid.UUID
+    volume: int = Field(description="Sum of `weight * count`")
+    set_count: int = Field(description="The number of performance logs")
+
+
+class PerformanceRollupListResponse(BaseModel):
+    items: list[PerformanceRollupListItemResponse]
+
+
+@router.api_wrapper(
+    "GET",
+    "",
+    error_codes=[],
+)
+async def performance_rollup_list(
+    q: PerformanceRollupListRequest = Depends(),
+) -> PerformanceRollupListResponse:
+    performance_rollup_query = sa_exp.select(
+        m.PerformanceRollup.period_start,
+        m.PerformanceRollup.exercise_category_id,
+        m.PerformanceRollup.volume,
+        m.PerformanceRollup.set_count,
+    ).where(
+        m.PerformanceRollup.period == q.period,
+        # emptied by deletions
+        m.PerformanceRollup.set_count > 0,
+    )
+
+    if q.since is not None:
+        performance_rollup_query = performance_rollup_query.where(
+            m.PerformanceRollup.period_start >= q.since
+        )
+    if q.until is not None:
+        performance_rollup_query = performance_rollup_query.where(
+            m.PerformanceRollup.period_start <= q.until
+        )
+    if q.exercise_category_id is not None:
+        performance_rollup_query = performance_rollup_query.where(
+            m.PerformanceRollup.exercise_category_id == q.exercise_category_id
+        )
+
+    rows = (
+        await AppCtx.current.db.session.execute(
+            performance_rollup_query.order_by(
+                m.PerformanceRollup.period_start,
+                m.PerformanceRollup.exercise_category_id,
+            )
+        )
+    ).all()
+
+    return PerformanceRollupListResponse(
+        items=[
+            PerformanceRollupListItemResponse(
+                period_start=row.period_start,
+                exercise_category_id=row.exercise_category_id,
+                volume=row.volume,
+                set_count=row.set_count,
+            )
+            for row in rows
+        ]
+    )
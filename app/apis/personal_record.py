@@ -0,0 +1,176 @@
+import uuid
+
+from pydantic import BaseModel, Field
+from sqlalchemy import func as sa_func
+from sqlalchemy.dialects import postgresql as pg_dialect
+from sqlalchemy.sql import expression as sa_exp
+from sqlalchemy.sql.dml import Insert
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.selectable import FromClause
+
+from app.ctx import AppCtx
+from app.models import orm as m
+from app.utils import fastapi as fastapi_utils
+
+router = fastapi_utils.CustomAPIRouter(
+    prefix="/exercise/category", tags=["exercise_category"]
+)
+
+
+def _record_query(
+    performance_logs: FromClause,
+    performance_log_filter: ColumnElement[bool] | None = None,
+) -> sa_exp.Select:
+    record_query = (
+        sa_exp.select(
+            performance_logs.c.exercise_category_id,
+            performance_logs.c.weight,
+            sa_func.max(performance_logs.c.count),
+            sa_func.now(),
+        )
+        .where(performance_logs.c.count > 0)
+        .group_by(performance_logs.c.exercise_category_id, performance_logs.c.weight)
+    )
+    if performance_log_filter is not None:
+        record_query = record_query.where(performance_log_filter)
+    return record_query
+
+
+def records_upsert(
+    performance_logs: FromClause,
+    performance_log_filter: ColumnElement[bool] | None = None,
+) -> Insert:
+    """The upsert raising the records to the given performance logs.
+
+    `performance_logs` is the `performance_log` table, or a CTE of the rows
+    returned by the `INSERT` of the same statement.
+    """
+    insert_query = pg_dialect.insert(m.PersonalRecord).from_select(
+        ["exercise_category_id", "weight", "count", "created"],
+        _record_query(performance_logs, performance_log_filter),
+    )
+
+    upsert_query: Insert = insert_query.on_conflict_do_update(
+        index_elements=[
+            m.PersonalRecord.exercise_category_id,
+            m.PersonalRecord.weight,
+        ],
+        set_={"count": insert_query.excluded.count, "modified": sa_func.now()},
+        where=insert_query.excluded.count > m.PersonalRecord.count,
+    )
+    return upsert_query
+
+
+async def raise_records(performance_log_filter: ColumnElement[bool]) -> None:
+    """Raises the records to the performance logs matching the filter, in the
+    current transaction.
+    """
+    await AppCtx.current.db.session.execute(
+        records_upsert(m.PerformanceLog.__table__, performance_log_filter)
+    )
+
+
+async def lower_records(
+    exercise_category_id: uuid.UUID, weight: int, count: int
+) -> None:
+    """Recomputes the records of the exercise category if a performance log of
+    `weight` and `count` was its record, in the current transaction.
+
+    The removal or the change of the log must be flushed beforehand.
+    """
+    record_count = (
+        await AppCtx.current.db.session.execute(
+            sa_exp.select(m.PersonalRecord.count).where(
+                m.PersonalRecord.exercise_category_id == exercise_category_id,
+                m.PersonalRecord.weight == weight,
+            )
+        )
+    ).scalar()
+
+    if record_count is None or count < record_count:
+        return
+
+    # NOTE : serializes recomputations of the category. Raising the records
+    #        does not conflict with it, as its upsert waits for the rows.
+    await AppCtx.current.db.session.execute(
+        sa_exp.select(m.ExerciseCategory.id)
+        .where(m.ExerciseCategory.id == exercise_category_id)
+        .with_for_update(key_share=True)
+    )
+
+    await AppCtx.current.db.session.execute(
+        sa_exp.delete(m.PersonalRecord).where(
+            m.PersonalRecord.exercise_category_id == exercise_category_id
+        )
+    )
+
+    insert_query = pg_dialect.insert(m.PersonalRecord).from_select(
+        ["exercise_category_id", "weight", "count", "created"],
+        _record_query(
+            m.PerformanceLog.__table__,
+            m.PerformanceLog.exercise_category_id == exercise_category_id,
+        ),
+    )
+
+    await AppCtx.current.db.session.execute(
+        insert_query.on_conflict_do_update(
+            index_elements=[
+                m.PersonalRecord.exercise_category_id,
+                m.PersonalRecord.weight,
+            ],
+            set_={"count": insert_query.excluded.count, "modified": sa_func.now()},
+        )
+    )
+
+
+def _estimate_one_rep_max(weight: int, count: int) -> float:
+    # Epley formula
+    return float(weight) if count == 1 else weight * (1 + count / 30)
+
+
+class PersonalRecordItemResponse(BaseModel):
+    weight: int
+    count: int = Field(description="The best count at this weight")
+
+
+class PersonalRecordsResponse(BaseModel):
+    best_weight: int | None = Field(
+        description="The heaviest weight ever lifted. `null` if no log."
+    )
+    estimated_one_rep_max: float | None = Field(
+        description="The best one rep max estimated by the Epley formula.",
+    )
+    items: list[PersonalRecordItemResponse] = Field(
+        description="The best count at each weight, heaviest first",
+    )
+
+
+@router.api_wrapper(
+    "GET",
+    "/:id/records",
+    error_codes=[],
+)
+async def personal_record_list(id: uuid.UUID) -> PersonalRecordsResponse:
+    # NOTE : reads one row per distinct weight, whatever the number of logs
+    rows = (
+        await AppCtx.current.db.session.execute(
+            sa_exp.select(
+                m.PersonalRecord.weight,
+                m.PersonalRecord.count.label("best_count"),
+            )
+            .where(m.PersonalRecord.exercise_category_id == id)
+            .order_by(m.PersonalRecord.weight.desc())
+        )
+    ).all()
+
+    return PersonalRecordsResponse(
+        best_weight=rows[0].weight if rows else None,
+        estimated_one_rep_max=max(
+            (_estimate_one_rep_max(row.weight, row.best_count) for row in rows),
+            default=None,
+        ),
+        items=[
+            PersonalRecordItemResponse(weight=row.weight, count=row.best_count)
+            for row in rows
+        ],
+    )
@@ -4,12 +4,12 @@ import contextlib
 import contextvars
 import dataclasses
 import logging
-import uuid
 from typing import TYPE_CHECKING, AsyncIterator
 
 if TYPE_CHECKING:
     from .settings import AppSettings
-    from .utils.sqla import SqlaEngineAndSession
+    from .utils.auth import AccessTokenKeyring, PasswordHasher
+    from .utils.sqla import PgNotificationListener, SqlaEngineAndSession
 
 logger = logging.getLogger(__name__)
 
@@ -28,31 +28,51 @@ class AppCtxMeta(type):
 class AppCtx(metaclass=AppCtxMeta):
     settings: AppSettings
     db: SqlaEngineAndSession
-
-    ctx_id: str
+    db_listener: PgNotificationListener
+    auth_keyring: AccessTokenKeyring
+    password_hasher: PasswordHasher
 
 
 async def create_app_ctx(app_settings: AppSettings) -> AppCtx:
-    from .utils.sqla import SqlaEngineAndSession
+    from .utils.auth import AccessTokenKeyring, PasswordHasher
+    from .utils.sqla import PgNotificationListener, SqlaEngineAndSession
 
     return AppCtx(
         settings=app_settings,
-        db=SqlaEngineAndSession(app_settings.DB_URI, app_settings.DB_OPTIONS),
-        ctx_id=str(uuid.uuid4()),
+        db=SqlaEngineAndSession(
+            app_settings.DB_URI,
+            app_settings.DB_OPTIONS,
+            prepared_statement_mode=app_settings.DB_PREPARED_STATEMENT_MODE,
+            prepared_statement_cache_size=(
+                app_settings.DB_PREPARED_STATEMENT_CACHE_SIZE
+            ),
+        ),
+        db_listener=PgNotificationListener(
+            app_settings.DB_LISTEN_URI or app_settings.DB_URI,
+        ),
+        auth_keyring=AccessTokenKeyring(
+            app_settings.SECRET_KEY.get_secret_value(),
+            app_settings.AUTH_TOKEN_CACHE_SIZE,
+        ),
+        password_hasher=PasswordHasher(
+            app_settings.PASSWORD_HASHING_WORKERS,
+            app_settings.PASSWORD_HASHING_QUEUE_SIZE,
+            app_settings.PASSWORD_HASHING_MIN_ITERATIONS,
+        ),
     )
 
 
 @contextlib.asynccontextmanager
 async def bind_app_ctx(app_ctx: AppCtx) -> AsyncIterator[None]:
-    var_set_token = _current_app_ctx_var.set(
-        dataclasses.replace(app_ctx, ctx_id=str(uuid.uuid4()))
-    )
+    var_set_token = _current_app_ctx_var.set(app_ctx)
+    session_slot_token = app_ctx.db.bind_session_slot()
     try:
         yield
     finally:
         try:
-            await app_ctx.db.clear_scoped_session()
+            await app_ctx.db.release_session()
         except Exception:
-            logger.warning("Failed to clear DB scoped session", exc_info=True)
+            logger.warning("Failed to release DB session", exc_info=True)
 
+        app_ctx.db.reset_session_slot(session_slot_token)
         _current_app_ctx_var.reset(var_set_token)
@@ -1,12 +1,20 @@
-# from .account import Account, AccountLogin
+from .account import Account, AccountLogin
+from .base_ import uuid7
+from .catalog_version import CatalogVersion
 from .daily_log import DailyLog
 from .exercise_category import ExerciseCategory
 from .performance_log import PerformanceLog
+from .performance_rollup import PerformanceRollup
+from .personal_record import PersonalRecord
 
 __all__ = [
     "Account",
     "AccountLogin",
+    "CatalogVersion",
     "DailyLog",
     "ExerciseCategory",
     "PerformanceLog",
+    "PerformanceRollup",
+    "PersonalRecord",
+    "uuid7",
 ]
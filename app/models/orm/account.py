@@ -8,7 +8,7 @@ from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.schema import ForeignKey, Index
 from sqlalchemy.sql import sqltypes
 
-from .base_ import Base
+from .base_ import Base, uuid7
 
 
 class Account(Base):
@@ -17,7 +17,8 @@ class Account(Base):
     id: Mapped[uuid.UUID] = mapped_column(
         pg_dialect.UUID(as_uuid=True),
         primary_key=True,
-        server_default=sa_func.uuid_generate_v4_v4(),
+        default=uuid7,
+        server_default=sa_func.uuid_generate_v7(),
     )
 
     username: Mapped[str] = mapped_column(sqltypes.String, nullable=False, unique=True)
@@ -33,7 +34,8 @@ class AccountLogin(Base):
     id: Mapped[uuid.UUID] = mapped_column(
         pg_dialect.UUID(as_uuid=True),
         primary_key=True,
-        server_default=sa_func.uuid_generate_v4(),
+        default=uuid7,
+        server_default=sa_func.uuid_generate_v7(),
     )
 
     ipaddr: Mapped[str] = mapped_column(sqltypes.String, nullable=False)
@@ -1,17 +1,72 @@
 from __future__ import annotations
 
 import datetime
+import os
+import time
 import uuid
 from typing import TYPE_CHECKING
 
+from sqlalchemy import event
 from sqlalchemy import types as sa_types
 from sqlalchemy.orm import DeclarativeBase, Mapped, declared_attr, mapped_column
-from sqlalchemy.schema import Index
+from sqlalchemy.schema import DDL, Index
 
 if TYPE_CHECKING:
     from sqlalchemy.sql.schema import ColumnCollectionConstraint, Table
 
 
+def uuid7() -> uuid.UUID:
+    """Time-ordered UUID (RFC 9562 version 7) for primary keys.
+
+    New keys land on the rightmost page of the index instead of a random one.
+    The sub-millisecond fraction fills `rand_a`, so that the keys issued by a
+    process are ordered as well.
+    """
+    unix_ts_ns = time.time_ns()
+    unix_ts_ms, sub_ms_ns = divmod(unix_ts_ns, 1_000_000)
+    rand_a = sub_ms_ns * 4_096 // 1_000_000
+    rand_b = int.from_bytes(os.urandom(8), "big") & 0x3FFF_FFFF_FFFF_FFFF
+
+    return uuid.UUID(
+        int=(unix_ts_ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76
+        | rand_a << 64
+        | 0b10 << 62
+        | rand_b
+    )
+
+
+# NOTE : the server side counterpart of `uuid7()`, for the rows inserted by SQL
+#        only. Same as in the migration adding it.
+UUID_GENERATE_V7_DDL = DDL(
+    """
+    CREATE OR REPLACE FUNCTION uuid_generate_v7() RETURNS uuid AS $$
+        SELECT encode(
+            set_bit(
+                set_bit(
+                    overlay(
+                        uuid_send(gen_random_uuid())
+                        PLACING substring(
+                            int8send(
+                                floor(
+                                    extract(epoch FROM clock_timestamp()) * 1000
+                                )::bigint
+                            )
+                            FROM 3
+                        )
+                        FROM 1 FOR 6
+                    ),
+                    52, 1
+                ),
+                53, 1
+            ),
+            'hex'
+        )::uuid
+    $$ LANGUAGE SQL VOLATILE
+    """
+)
+
+
 class Base(DeclarativeBase):
     __abstract__ = True
 
@@ -54,3 +109,5 @@ Base.metadata.naming_convention = {
     "fk": "fk_%(guid)s",
     "ck": "ck_%(table_name)s_%(constraint_name)s",
 }
+
+event.listen(Base.metadata, "before_create", UUID_GENERATE_V7_DDL)
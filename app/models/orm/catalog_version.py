@@ -0,0 +1,22 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import sqltypes
+
+from .base_ import Base
+
+
+class CatalogVersion(Base):
+    """Version of a table cached by every worker as a whole, or served with an
+    ETag.
+
+    Bumped in the same transaction as each change of the table.
+    """
+
+    __tablename__ = "catalog_version"
+
+    name: Mapped[str] = mapped_column(sqltypes.String, primary_key=True)
+
+    version: Mapped[int] = mapped_column(
+        sqltypes.BigInteger,
+        nullable=False,
+        default=0,
+    )
@@ -5,7 +5,7 @@ from sqlalchemy.dialects import postgresql as pg_dialect
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import sqltypes
 
-from .base_ import Base
+from .base_ import Base, uuid7
 
 
 class DailyLog(Base):
@@ -14,7 +14,8 @@ class DailyLog(Base):
     id: Mapped[uuid.UUID] = mapped_column(
         pg_dialect.UUID(as_uuid=True),
         primary_key=True,
-        server_default=sa_func.uuid_generate_v4(),
+        default=uuid7,
+        server_default=sa_func.uuid_generate_v7(),
     )
 
     date: Mapped[datetime.date] = mapped_column(
@@ -6,7 +6,7 @@ from sqlalchemy.schema import Index
 from sqlalchemy.sql import sqltypes
 from app.models.orm.daily_log import DailyLog
 
-from .base_ import Base
+from .base_ import Base, uuid7
 
 
 class ExerciseCategory(Base):
@@ -15,7 +15,8 @@ class ExerciseCategory(Base):
     id: Mapped[uuid.UUID] = mapped_column(
         pg_dialect.UUID(as_uuid=True),
         primary_key=True,
-        server_default=sa_func.uuid_generate_v4(),
+        default=uuid7,
+        server_default=sa_func.uuid_generate_v7(),
     )
 
     name: Mapped[str] = mapped_column(sqltypes.String, nullable=False)
@@ -7,7 +7,7 @@ from sqlalchemy.sql import sqltypes
 from app.models.orm.daily_log import DailyLog
 from app.models.orm.exercise_category import ExerciseCategory
 
-from .base_ import Base
+from .base_ import Base, uuid7
 
 
 class PerformanceLog(Base):
@@ -16,7 +16,8 @@ class PerformanceLog(Base):
     id: Mapped[uuid.UUID] = mapped_column(
         pg_dialect.UUID(as_uuid=True),
         primary_key=True,
-        server_default=sa_func.uuid_generate_v4(),
+        default=uuid7,
+        server_default=sa_func.uuid_generate_v7(),
     )
 
     weight: Mapped[int] = mapped_column(
@@ -46,3 +47,8 @@ class PerformanceLog(Base):
         nullable=False,
     )
     daily_log: Mapped[DailyLog] = relationship("DailyLog", uselist=False)
+
+
+# NOTE : also serve the checks of the foreign keys on deleting the parents
+Index(None, PerformanceLog.daily_log_id, PerformanceLog.created)
+Index(None, PerformanceLog.exercise_category_id, PerformanceLog.created)
@@ -0,0 +1,38 @@
+import datetime
+import uuid
+
+from sqlalchemy.dialects import postgresql as pg_dialect
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.schema import ForeignKey
+from sqlalchemy.sql import sqltypes
+
+from .base_ import Base
+
+
+class PerformanceRollup(Base):
+    """Volume and set count of `performance_log` per exercise category and
+    period. Updated in the same transaction as each change of the logs.
+    """
+
+    __tablename__ = "performance_rollup"
+
+    # "week" or "month"
+    period: Mapped[str] = mapped_column(sqltypes.String, primary_key=True)
+    period_start: Mapped[datetime.date] = mapped_column(sqltypes.Date, primary_key=True)
+    exercise_category_id: Mapped[uuid.UUID] = mapped_column(
+        pg_dialect.UUID(as_uuid=True),
+        ForeignKey("exercise_category.id"),
+        primary_key=True,
+    )
+
+    # sum of `weight * count`
+    volume: Mapped[int] = mapped_column(
+        sqltypes.BigInteger,
+        nullable=False,
+        default=0,
+    )
+    set_count: Mapped[int] = mapped_column(
+        sqltypes.Integer,
+        nullable=False,
+        default=0,
+    )
@@ -0,0 +1,26 @@
+import uuid
+
+from sqlalchemy.dialects import postgresql as pg_dialect
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.schema import ForeignKey
+from sqlalchemy.sql import sqltypes
+
+from .base_ import Base
+
+
+class PersonalRecord(Base):
+    """The best count at each weight of an exercise category.
+
+    Updated in the same transaction as each change of `performance_log`.
+    """
+
+    __tablename__ = "personal_record"
+
+    exercise_category_id: Mapped[uuid.UUID] = mapped_column(
+        pg_dialect.UUID(as_uuid=True),
+        ForeignKey("exercise_category.id"),
+        primary_key=True,
+    )
+    weight: Mapped[int] = mapped_column(sqltypes.Integer, primary_key=True)
+
+    count: Mapped[int] = mapped_column(sqltypes.Integer, nullable=False)
@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import AnyUrl, BaseSettings, Field, HttpUrl, SecretStr
 
@@ -33,6 +33,47 @@ class AppSettings(BaseSettings):
         default=SecretStr("default_unsafe_secret_key"),
         description="Secret key to validate auth JWT.",
     )
+    AUTH_TOKEN_CACHE_SIZE: int = Field(
+        default=10_000,
+        description="The maximum number of verified auth JWTs kept per worker.",
+        ge=1,
+    )
+
+    PASSWORD_HASHING_WORKERS: int = Field(
+        default=2,
+        description="The number of threads hashing passwords per worker.",
+        ge=1,
+    )
+    PASSWORD_HASHING_QUEUE_SIZE: int = Field(
+        default=32,
+        description=(
+            "The maximum number of password hashes waiting for a thread. Logins "
+            "and signups over it fail with 503."
+        ),
+        ge=0,
+    )
+    PASSWORD_HASHING_TARGET_SECONDS: float | None = Field(
+        default=0.1,
+        description=(
+            "The time a password hash should take. The PBKDF2 iterations are "
+            "calibrated to it on startup, and stored hashes made with other "
+            "iterations are rehashed on login. If None, the minimum is used."
+        ),
+        gt=0,
+    )
+    PASSWORD_HASHING_MIN_ITERATIONS: int = Field(
+        default=100_000,
+        description="The minimum PBKDF2 iterations, whatever the calibration.",
+        ge=1,
+    )
+
+    RATE_LIMIT_ENABLED: bool = Field(
+        default=True,
+        description=(
+            "If False, the rate limits per client IP of the routes are not "
+            "applied, e.g. for tests sending every request from one IP."
+        ),
+    )
 
     DB_URI: AnyUrl = Field(
         default=AnyUrl(
@@ -42,11 +83,37 @@ class AppSettings(BaseSettings):
         description="DB connection URI.",
     )
 
+    DB_LISTEN_URI: AnyUrl | None = Field(
+        default=None,
+        description=(
+            "DB connection URI to LISTEN for cache invalidations. If omitted, "
+            "`DB_URI` is used. It must not go through pgbouncer's transaction "
+            "pooling."
+        ),
+    )
+
     DB_OPTIONS: dict[str, Any] = Field(
         default={"pool_recycle": 15 * 60},
         description="PosstgreSQL option to create a connection.",
     )
 
+    DB_PREPARED_STATEMENT_MODE: Literal["disabled", "pgbouncer", "direct"] = Field(
+        default="disabled",
+        description=(
+            "How prepared statements are reused. `pgbouncer` names statements "
+            "after the hash of their SQL and keeps an LRU of them per connection, "
+            "which requires pgbouncer's `max_prepared_statements` on transaction "
+            "pooling. `direct` uses the driver's own cache and is only safe for "
+            "direct PostgreSQL connections. `disabled` prepares every statement "
+            "again."
+        ),
+    )
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = Field(
+        default=100,
+        description="The maximum number of prepared statements per connection.",
+        ge=1,
+    )
+
     class Config:
         env_file = ".env"
         env_prefix = "app_"
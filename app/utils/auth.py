@@ -2,25 +2,41 @@ from __future__ import annotations
 
 import asyncio
 import binascii
+import collections
+import concurrent.futures
+import dataclasses
 import hashlib
+import logging
 import os
 import time
 import uuid
-from typing import NamedTuple
+from typing import Any, Callable, NamedTuple, TypeVar
 
 import jwt
 from fastapi import Depends
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jwt.algorithms import HMACAlgorithm
 
 from app.ctx import AppCtx
 
 from . import fastapi as fastapi_utils
 
+logger = logging.getLogger(__name__)
+
+# stored as `pbkdf2_sha256$<iterations>$<salt hex>$<hash hex>`
+_HASH_ALGORITHM = "pbkdf2_sha256"
 _PBKDF2_HASH_NAME = "SHA256"
-_PBKDF2_ITERATIONS = 100_000
+
+# stored as `<salt hex>:<hash hex>`, before the parameters were stored
+_LEGACY_PBKDF2_ITERATIONS = 100_000
+
+_CALIBRATION_ITERATIONS = 50_000
+_CALIBRATION_ROUNDS = 3
 
 _TOKEN_TTL = 7 * 24 * 60 * 60  # 7 days
 
+_T = TypeVar("_T")
+
 
 class AuthInfo(NamedTuple):
     username: str
@@ -35,38 +51,261 @@ class AuthInfo(NamedTuple):
 auth_scheme = HTTPBearer(auto_error=False)
 
 
+class AccessTokenKeyring:
+    """Key material of the access tokens, and the tokens verified with it.
+
+    The secret is prepared once, when the app context is created. Verified
+    tokens are kept in a LRU keyed by their digest until they expire, so repeat
+    requests of a client skip both the signature verification and the parsing.
+    """
+
+    def __init__(self, secret_key: str, cache_size: int) -> None:
+        self._key = HMACAlgorithm(HMACAlgorithm.SHA256).prepare_key(secret_key)
+        self._cache_size = cache_size
+        self._verified: collections.OrderedDict[
+            bytes, AuthInfo
+        ] = collections.OrderedDict()
+
+    def encode(self, payload: dict[str, Any]) -> str:
+        return jwt.encode(payload=payload, key=self._key, algorithm="HS256")
+
+    def decode(self, token: str) -> AuthInfo:
+        token_digest = hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+        auth_info = self._verified.get(token_digest)
+        if auth_info is not None:
+            if auth_info.expire_at <= time.time():
+                self._verified.pop(token_digest, None)
+                raise jwt.ExpiredSignatureError("Signature has expired")
+
+            self._verified.move_to_end(token_digest)
+            return auth_info
+
+        token_info = jwt.decode(token, key=self._key, algorithms=["HS256"])
+        auth_info = AuthInfo(
+            username=token_info["username"],
+            account_id=token_info["account_id"],
+            account_login_id=token_info["account_login_id"],
+            expire_at=token_info["exp"],
+            issued_at=token_info["iat"],
+            issuer=token_info["iss"],
+        )
+
+        self._verified[token_digest] = auth_info
+        while len(self._verified) > self._cache_size:
+            self._verified.popitem(last=False)
+
+        return auth_info
+
+
+@dataclasses.dataclass
+class _DurationStats:
+    count: int = 0
+    seconds_sum: float = 0.0
+    seconds_max: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.seconds_sum += seconds
+        self.seconds_max = max(self.seconds_max, seconds)
+
+
+class PasswordHasher:
+    """Runs PBKDF2 on its own threadpool, apart from the default executor.
+
+    At most `workers + queue_size` hashes are pending at once. Over that, the
+    hash is rejected at once with `ServiceUnavailableError` instead of queueing,
+    so that a login storm cannot stall unrelated work.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        queue_size: int,
+        min_iterations: int = _LEGACY_PBKDF2_ITERATIONS,
+    ) -> None:
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hasher"
+        )
+        self._max_pending = workers + queue_size
+        self._pending = 0
+
+        self.min_iterations = min_iterations
+        # PBKDF2 iterations of new hashes, until `calibrate()`
+        self.iterations = min_iterations
+
+        self.rejected = 0
+        self.queue_wait = _DurationStats()
+        self.hash_time = _DurationStats()
+
+    async def run(self, func: Callable[[], _T]) -> _T:
+        if self._pending >= self._max_pending:
+            self.rejected += 1
+            raise fastapi_utils.ServiceUnavailableError()
+
+        def _timed() -> tuple[_T, float, float]:
+            started = time.perf_counter()
+            return func(), started, time.perf_counter()
+
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        future = self._executor.submit(_timed)
+
+        # NOTE : released when the thread is done, not when the caller is, so
+        #        cancelled callers cannot over-commit the threads.
+        self._pending += 1
+        future.add_done_callback(
+            lambda _: loop.call_soon_threadsafe(self._release_pending)
+        )
+
+        result, started, finished = await asyncio.wrap_future(future)
+
+        self.queue_wait.observe(started - submitted)
+        self.hash_time.observe(finished - started)
+        return result
+
+    async def calibrate(self, target_seconds: float) -> None:
+        """Sets `iterations` so that a hash takes about `target_seconds` here."""
+
+        def _measure() -> float:
+            started = time.perf_counter()
+            hashlib.pbkdf2_hmac(
+                _PBKDF2_HASH_NAME,
+                b"calibration",
+                os.urandom(16),
+                _CALIBRATION_ITERATIONS,
+            )
+            return time.perf_counter() - started
+
+        loop = asyncio.get_running_loop()
+        elapsed = min(
+            [
+                await loop.run_in_executor(self._executor, _measure)
+                for _ in range(_CALIBRATION_ROUNDS)
+            ]
+        )
+
+        # rounded, so that workers on the same hardware mostly agree
+        iterations = (
+            int(_CALIBRATION_ITERATIONS * target_seconds / elapsed) // 10_000 * 10_000
+        )
+        self.iterations = max(self.min_iterations, iterations)
+
+        logger.info(
+            "Calibrated password hashing : %d iterations (%.1fms per %d)",
+            self.iterations,
+            elapsed * 1000,
+            _CALIBRATION_ITERATIONS,
+        )
+
+    def _release_pending(self) -> None:
+        self._pending -= 1
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "pending": self._pending,
+            "rejected": self.rejected,
+            **{
+                f"queue_wait_{key}": value
+                for key, value in dataclasses.asdict(self.queue_wait).items()
+            },
+            **{
+                f"hash_{key}": value
+                for key, value in dataclasses.asdict(self.hash_time).items()
+            },
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _HashedPassword(NamedTuple):
+    algorithm: str
+    iterations: int
+    pbkdf2_salt: bytes
+    pw_hash: bytes
+    # `salt:hash`, made before the format described its parameters
+    is_legacy: bool
+
+
+def _parse_hashed_password(hashed_password: str) -> _HashedPassword:
+    if "$" not in hashed_password:
+        pbkdf2_salt_hex, pw_hash_hex = hashed_password.split(":")
+        return _HashedPassword(
+            _HASH_ALGORITHM,
+            _LEGACY_PBKDF2_ITERATIONS,
+            binascii.unhexlify(pbkdf2_salt_hex),
+            binascii.unhexlify(pw_hash_hex),
+            is_legacy=True,
+        )
+
+    algorithm, iterations, pbkdf2_salt_hex, pw_hash_hex = hashed_password.split("$")
+    return _HashedPassword(
+        algorithm,
+        int(iterations),
+        binascii.unhexlify(pbkdf2_salt_hex),
+        binascii.unhexlify(pw_hash_hex),
+        is_legacy=False,
+    )
+
+
 async def generate_hashed_password(password: str) -> str:
+    iterations = AppCtx.current.password_hasher.iterations
+
     def _inner() -> str:
         pbkdf2_salt = os.urandom(16)
         pw_hash = hashlib.pbkdf2_hmac(
             _PBKDF2_HASH_NAME,
             password.encode(),
             pbkdf2_salt,
-            _PBKDF2_ITERATIONS,
+            iterations,
         )
 
-        return "%s:%s" % (
+        return "%s$%d$%s$%s" % (
+            _HASH_ALGORITHM,
+            iterations,
             binascii.hexlify(pbkdf2_salt).decode(),
             binascii.hexlify(pw_hash).decode(),
         )
 
-    return await asyncio.get_running_loop().run_in_executor(None, _inner)
+    return await AppCtx.current.password_hasher.run(_inner)
 
 
 async def validate_hashed_password(password: str, hashed_password: str) -> bool:
-    def _inner() -> bool:
-        pbkdf2_salt_hex, pw_hash_hex = hashed_password.split(":")
+    algorithm, iterations, pbkdf2_salt, pw_hash, _ = _parse_hashed_password(
+        hashed_password
+    )
+    if algorithm != _HASH_ALGORITHM:
+        return False
 
+    def _inner() -> bool:
         pw_challenge = hashlib.pbkdf2_hmac(
             _PBKDF2_HASH_NAME,
             password.encode(),
-            binascii.unhexlify(pbkdf2_salt_hex),
-            _PBKDF2_ITERATIONS,
+            pbkdf2_salt,
+            iterations,
         )
 
-        return pw_challenge == binascii.unhexlify(pw_hash_hex)
+        return pw_challenge == pw_hash
 
-    return await asyncio.get_running_loop().run_in_executor(None, _inner)
+    return await AppCtx.current.password_hasher.run(_inner)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Whether the hash is made with other parameters than the current ones.
+
+    Legacy hashes are always rehashed into the current format. Otherwise,
+    iterations within 25% of the current ones are kept, so that workers
+    calibrated slightly differently do not rehash each other's hashes.
+    """
+    parsed = _parse_hashed_password(hashed_password)
+    if parsed.is_legacy or parsed.algorithm != _HASH_ALGORITHM:
+        return True
+
+    current_iterations = AppCtx.current.password_hasher.iterations
+    return not (
+        current_iterations * 0.8 <= parsed.iterations <= current_iterations * 1.25
+    )
 
 
 def create_access_token(
@@ -75,31 +314,27 @@ def create_access_token(
     account_login_id: uuid.UUID,
 ) -> str:
     current = time.time()
-    return jwt.encode(
-        payload={
+    return AppCtx.current.auth_keyring.encode(
+        {
             "username": username,
             "account_id": str(account_id),
             "account_login_id": str(account_login_id),
             "exp": current + _TOKEN_TTL,
             "iat": current,
             "iss": "sample-api",
-        },
-        key=AppCtx.current.settings.SECRET_KEY.get_secret_value(),
-        algorithm="HS256",
+        }
     )
 
 
-def resolve_token(
+# NOTE : not run in the threadpool, both to skip the thread hop and to keep
+#        `AccessTokenKeyring` on the event loop thread only.
+async def resolve_token(
     credentials: HTTPAuthorizationCredentials | None = Depends(auth_scheme),
 ) -> AuthInfo:
     if credentials is None:
         raise fastapi_utils.UnauthorizedError()
     try:
-        token_info = jwt.decode(
-            credentials.credentials,
-            key=AppCtx.current.settings.SECRET_KEY.get_secret_value(),
-            algorithms=["HS256"],
-        )
+        return AppCtx.current.auth_keyring.decode(credentials.credentials)
     except jwt.InvalidIssuerError:
         raise fastapi_utils.AuthError(fastapi_utils.AuthErrorCodeEnum.InvalidIssuer)
     except jwt.InvalidAlgorithmError:
@@ -112,12 +347,3 @@ def resolve_token(
         raise fastapi_utils.AuthError(
             fastapi_utils.AuthErrorCodeEnum.InvalidAccessToken,
         )
-
-    return AuthInfo(
-        username=token_info["username"],
-        account_id=token_info["account_id"],
-        account_login_id=token_info["account_login_id"],
-        expire_at=token_info["exp"],
-        issued_at=token_info["iat"],
-        issuer=token_info["iss"],
-    )
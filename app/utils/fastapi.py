@@ -2,16 +2,29 @@ from __future__ import annotations
 
 import dataclasses
 import enum
+import functools
+import hashlib
+import inspect
 import json
 import logging
-from typing import TYPE_CHECKING, Any, Callable, Literal, get_type_hints
+import math
+import time
+import uuid
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Literal, get_type_hints
 
 import anyio
-from fastapi import APIRouter, Request, status
+import orjson
+import sqlalchemy.exc
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.datastructures import DefaultPlaceholder
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from fastapi.types import DecoratedCallable
-from pydantic import BaseModel
+from fastapi.utils import create_response_field
+from pydantic import BaseModel, ValidationError
+
+from app.ctx import AppCtx, bind_app_ctx
+from app.utils import sqla as sqla_utils
 
 if TYPE_CHECKING:
     from starlette.types import ASGIApp, Message, Receive, Scope, Send
@@ -49,6 +62,10 @@ class LogicErrorCodeEnum(str, enum.Enum):
 
     AlreadyLogged = "already_logged"
 
+    InvalidCursor = "invalid_cursor"
+
+    InvalidImportFile = "invalid_import_file"
+
     @property
     def desc(self) -> str:
         return {
@@ -59,6 +76,8 @@ class LogicErrorCodeEnum(str, enum.Enum):
             self.RaceCondition: "Race condition occurred. try again.",
             self.WrongPassword: "Failed to login with incorrect password.",
             self.AlreadyLogged: "Already exist today log",
+            self.InvalidCursor: "Failed to decode the pagination cursor.",
+            self.InvalidImportFile: "The file to import has no valid CSV header.",
         }[self]
 
 
@@ -80,6 +99,15 @@ class UnauthorizedError(Exception):
     pass
 
 
+class ServiceUnavailableError(Exception):
+    pass
+
+
+@dataclasses.dataclass
+class TooManyRequestsError(Exception):
+    retry_after: float
+
+
 class _ErrorResponseModel(BaseModel):
     code: str
     message: str
@@ -117,6 +145,16 @@ class UnprocessableEntityErrorModel(_ErrorResponseModel):
     )
 
 
+class TooManyRequestsErrorModel(_ErrorResponseModel):
+    code = "too_many_requests"
+    message = "too many requests. try again later."
+
+
+class ServiceUnavailableErrorModel(_ErrorResponseModel):
+    code = "service_unavailable"
+    message = "server is overloaded. try again later."
+
+
 class ServerErrorModel(_ErrorResponseModel):
     code = "server_error"
     message = "unexpected server error"
@@ -137,6 +175,13 @@ FASTAPI_RESPONSES: dict[int | str, dict[str, Any]] = {
     },
 }
 
+SERVICE_UNAVAILABLE_RESPONSES: dict[int | str, dict[str, Any]] = {
+    503: {
+        "description": "Overloaded",
+        "model": _ErrorResponseModel,
+    },
+}
+
 
 class ErrorReportAndForgetMiddleware:
     def __init__(self, app: ASGIApp) -> None:
@@ -181,6 +226,18 @@ class ErrorReportAndForgetMiddleware:
                 status_code=status.HTTP_409_CONFLICT,
                 content=_ErrorResponseModel.from_exc(err).dict(),
             )
+        except TooManyRequestsError as err:
+            err_response = JSONResponse(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                content=TooManyRequestsErrorModel().dict(),
+                headers={"Retry-After": str(math.ceil(err.retry_after))},
+            )
+        except ServiceUnavailableError:
+            err_response = JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content=ServiceUnavailableErrorModel().dict(),
+                headers={"Retry-After": "1"},
+            )
         except Exception:
             logger.exception("Internal server error")
 
@@ -193,6 +250,23 @@ class ErrorReportAndForgetMiddleware:
             await err_response(scope, receive, send)
 
 
+class AppCtxMiddleware(ErrorReportAndForgetMiddleware):
+    """Binds `AppCtx` for each request and reports its errors in one layer.
+
+    Unlike `BaseHTTPMiddleware`, the routing function runs in the same task
+    without any memory stream in between.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        app_ctx: AppCtx = scope["app"].extra["_app_ctx"]
+        async with bind_app_ctx(app_ctx):
+            await super().__call__(scope, receive, send)
+
+
 def _build_desc(
     error_codes: list[AuthErrorCodeEnum | LogicErrorCodeEnum],
     desc: str | None = None,
@@ -228,15 +302,272 @@ class DefaultResponse(BaseModel):
     pass
 
 
+def _release_session_on_return(
+    endpoint: Callable[..., Awaitable[Any]]
+) -> Callable[..., Awaitable[Any]]:
+    @functools.wraps(endpoint)
+    async def _wrapper(*args: Any, **kwargs: Any) -> Any:
+        try:
+            try:
+                return await endpoint(*args, **kwargs)
+            except sqlalchemy.exc.DBAPIError as err:
+                if not sqla_utils.is_stale_statement_error(err):
+                    raise
+
+            # NOTE : routing functions commit at their end, so nothing of the
+            #        failed call is kept. It is called once again on a new
+            #        session, which prepares the statements again.
+            logger.warning("retrying %s on a stale statement", endpoint.__name__)
+            await AppCtx.current.db.release_session()
+            return await endpoint(*args, **kwargs)
+        finally:
+            # give the connection back to the pool before the response is
+            # serialized and sent
+            await AppCtx.current.db.release_session()
+
+    # resolve annotations here, as FastAPI looks them up in `__globals__`
+    _wrapper.__signature__ = inspect.signature(endpoint, eval_str=True)  # type: ignore
+
+    return _wrapper
+
+
+def _encode_model(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        # nested models are called back for in turn
+        return obj.__dict__
+    if isinstance(obj, uuid.UUID):
+        # orjson encodes `uuid.UUID` itself but not its subclasses, e.g. the
+        # `asyncpg.pgproto.pgproto.UUID` of the loaded rows
+        return str(obj)
+    raise TypeError
+
+
+class ModelJSONResponse(JSONResponse):
+    """JSON response encoding the response models as they are returned.
+
+    `UUID`, dates, datetimes and enums are encoded by orjson natively, instead
+    of `jsonable_encoder()` walking every field of every object beforehand.
+    Chosen as the default response class of the app in `create_app()`.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_encode_model)
+
+
+def _is_model_content(content: Any) -> bool:
+    return isinstance(content, BaseModel) or (
+        isinstance(content, list)
+        and all(isinstance(item, BaseModel) for item in content)
+    )
+
+
+def _find_parameter(signature: inspect.Signature, type_: type) -> str | None:
+    for parameter in signature.parameters.values():
+        if isinstance(parameter.annotation, type) and issubclass(
+            parameter.annotation, type_
+        ):
+            return parameter.name
+    return None
+
+
+def _render_on_return(
+    endpoint: Callable[..., Awaitable[Any]],
+    response_model: Any,
+    trusted_output: bool,
+) -> Callable[..., Awaitable[Any]]:
+    response_field = create_response_field(
+        name=f"Response_{endpoint.__name__}", type_=response_model
+    )
+
+    # NOTE : FastAPI passes the request and the response to one parameter each,
+    #        so the ones of the routing function are shared when it has them.
+    signature = inspect.signature(endpoint, eval_str=True)
+    parameters = list(signature.parameters.values())
+
+    request_name = _find_parameter(signature, Request)
+    sub_response_name = _find_parameter(signature, Response)
+    if request_name is None:
+        parameters.append(
+            inspect.Parameter(
+                "_render_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request
+            )
+        )
+    if sub_response_name is None:
+        parameters.append(
+            inspect.Parameter(
+                "_render_sub_response",
+                inspect.Parameter.KEYWORD_ONLY,
+                annotation=Response,
+            )
+        )
+
+    @functools.wraps(endpoint)
+    async def _wrapper(*args: Any, **kwargs: Any) -> Any:
+        request: Request = (
+            kwargs.pop("_render_request")
+            if request_name is None
+            else kwargs[request_name]
+        )
+        sub_response: Response = (
+            kwargs.pop("_render_sub_response")
+            if sub_response_name is None
+            else kwargs[sub_response_name]
+        )
+
+        content = await endpoint(*args, **kwargs)
+
+        route = request.scope["route"]
+        response_class = getattr(route.response_class, "value", route.response_class)
+        if not issubclass(response_class, ModelJSONResponse):
+            return content
+
+        if not trusted_output:
+            # same as FastAPI, which copies the models into the response model
+            content, errors = response_field.validate(content, {}, loc=("response",))
+            if errors:
+                raise ValidationError(
+                    errors if isinstance(errors, list) else [errors],
+                    response_field.type_,
+                )
+
+        if not _is_model_content(content):
+            return content
+
+        # NOTE : a returned `Response` is sent as is, so the status code and
+        #        the headers set by the dependencies are carried over here.
+        response = response_class(
+            content,
+            status_code=sub_response.status_code or route.status_code or 200,
+        )
+        response.headers.raw.extend(sub_response.headers.raw)
+        return response
+
+    _wrapper.__signature__ = signature.replace(parameters=parameters)  # type: ignore
+
+    return _wrapper
+
+
+class RateLimit:
+    """Token bucket per client IP, in the memory of this worker.
+
+    Each IP may burst `burst` requests, refilled at `rate` per second. Idle
+    buckets are evicted once refilled, which is the same as having no bucket.
+    The buckets are spread over shards and each call sweeps one shard only, so
+    no single request pays for the eviction of every bucket.
+    """
+
+    def __init__(self, rate: float, burst: int, shards: int = 16) -> None:
+        self.rate = rate
+        self.burst = burst
+
+        self._ttl = burst / rate
+        # client IP -> (tokens, last updated)
+        self._shards: list[dict[str, tuple[float, float]]] = [{} for _ in range(shards)]
+        self._sweep_index = 0
+
+    def acquire(self, key: str) -> float:
+        """Takes a token of `key`.
+
+        Returns 0 if taken, or else the seconds until a token is available.
+        """
+        now = time.monotonic()
+        self._sweep(now)
+
+        shard = self._shards[hash(key) % len(self._shards)]
+        tokens, updated = shard.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+        if tokens < 1:
+            shard[key] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+        shard[key] = (tokens - 1, now)
+        return 0.0
+
+    def _sweep(self, now: float) -> None:
+        shard = self._shards[self._sweep_index]
+        self._sweep_index = (self._sweep_index + 1) % len(self._shards)
+
+        for key in [
+            key for key, (_, updated) in shard.items() if now - updated >= self._ttl
+        ]:
+            del shard[key]
+
+
+def _rate_limited(rate_limit: RateLimit) -> Callable[[Request], Awaitable[None]]:
+    # NOTE : async, so that the buckets are only touched on the event loop
+    async def _dependency(request: Request) -> None:
+        if not AppCtx.current.settings.RATE_LIMIT_ENABLED:
+            return
+
+        retry_after = rate_limit.acquire(get_client_ip(request))
+        if retry_after > 0:
+            raise TooManyRequestsError(retry_after=retry_after)
+
+    return _dependency
+
+
+def _conditional_get(
+    etag: Callable[[], Awaitable[str]]
+) -> Callable[[Request, Response], Awaitable[None]]:
+    async def _dependency(request: Request, response: Response) -> None:
+        # the same data is paginated or filtered differently by query params
+        etag_value = '"%s"' % (
+            hashlib.blake2b(
+                f"{await etag()}?{request.url.query}".encode(), digest_size=16
+            ).hexdigest()
+        )
+
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None and (
+            if_none_match.strip() == "*"
+            or etag_value
+            in [
+                client_etag.strip().removeprefix("W/")
+                for client_etag in if_none_match.split(",")
+            ]
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag_value},
+            )
+
+        response.headers["ETag"] = etag_value
+
+    return _dependency
+
+
 class CustomAPIRouter(APIRouter):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._trusted_output_endpoints: set[Callable[..., Any]] = set()
+
     def add_api_route(
         self,
         path: str,
         endpoint: Callable[..., Any],
         **kwargs: Any,
     ) -> None:
-        if kwargs.get("response_model") is None:
-            kwargs["response_model"] = get_type_hints(endpoint).get("return")
+        return_type = get_type_hints(endpoint).get("return")
+        # `Response` subclasses(e.g. `StreamingResponse`) are sent as is
+        returns_response = isinstance(return_type, type) and issubclass(
+            return_type, Response
+        )
+
+        if kwargs.get("response_model") is None and not returns_response:
+            kwargs["response_model"] = return_type
+
+        if inspect.iscoroutinefunction(endpoint):
+            trusted_output = endpoint in self._trusted_output_endpoints
+            endpoint = _release_session_on_return(endpoint)
+
+            # FastAPI infers the response model from the return type by default
+            response_model = kwargs.get("response_model")
+            if isinstance(response_model, DefaultPlaceholder):
+                response_model = return_type
+
+            if not returns_response and response_model is not None:
+                endpoint = _render_on_return(endpoint, response_model, trusted_output)
 
         return super().add_api_route(path, endpoint, **kwargs)
 
@@ -246,19 +577,65 @@ class CustomAPIRouter(APIRouter):
         path: str,
         *,
         error_codes: list[AuthErrorCodeEnum | LogicErrorCodeEnum] | None = None,
+        etag: Callable[[], Awaitable[str]] | None = None,
+        rate_limit: RateLimit | None = None,
+        trusted_output: bool = False,
         **kwargs: Any,
     ) -> Callable[[DecoratedCallable], DecoratedCallable]:
+        """
+        If `etag` is given, it is called before the routing function to get a
+        validator of the requested data. When the client already has it, `304
+        Not Modified` is returned without calling the routing function.
+
+        If `rate_limit` is given, requests over it are rejected with `429 Too
+        Many Requests` before any other dependency or the routing function.
+
+        If `trusted_output` is set, the returned models are sent as they are,
+        without being validated against the response model again. Only for
+        routing functions building the response models themselves.
+        """
         kwargs["description"] = _build_desc(
             error_codes or [],
             kwargs.get("description"),
         )
-        return {  # type: ignore
+
+        if rate_limit is not None:
+            kwargs["dependencies"] = [
+                Depends(_rate_limited(rate_limit)),
+                *kwargs.get("dependencies", []),
+            ]
+            kwargs["responses"] = {
+                429: {"description": "Too Many Requests", "model": _ErrorResponseModel},
+                **kwargs.get("responses", {}),
+            }
+
+        if etag is not None:
+            kwargs["dependencies"] = [
+                *kwargs.get("dependencies", []),
+                Depends(_conditional_get(etag)),
+            ]
+            kwargs["responses"] = {
+                304: {"description": "Not Modified"},
+                **kwargs.get("responses", {}),
+            }
+
+        decorators: dict[str, Callable[[DecoratedCallable], DecoratedCallable]] = {
             "DELETE": self.delete(path, **kwargs),
             "GET": self.get(path, **kwargs),
             "PATCH": self.patch(path, **kwargs),
             "POST": self.post(path, **kwargs),
             "PUT": self.put(path, **kwargs),
-        }[method]
+        }
+        decorator = decorators[method]
+
+        if not trusted_output:
+            return decorator
+
+        def _trusted_output_decorator(func: DecoratedCallable) -> DecoratedCallable:
+            self._trusted_output_endpoints.add(func)
+            return decorator(func)
+
+        return _trusted_output_decorator
 
 
 def get_client_ip(request: Request) -> str:
@@ -1,23 +1,114 @@
+from __future__ import annotations
+
+import abc
 import asyncio
+import base64
+import collections
+import contextlib
+import contextvars
+import datetime
 import hashlib
+import logging
 import random
 import time
 import uuid
-from typing import Any
+import weakref
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Iterable,
+    Literal,
+    Sequence,
+    cast,
+)
 
 import asyncpg
+import sqlalchemy.exc
+from sqlalchemy import event as sa_event
 from sqlalchemy import func as sa_func
 from sqlalchemy import types as sa_types
+from sqlalchemy.dialects import postgresql as pg_dialect
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
-    async_scoped_session,
     async_sessionmaker,
     create_async_engine,
 )
 from sqlalchemy.sql import expression as sa_exp
+from sqlalchemy.sql.dml import Insert
+from sqlalchemy.sql.elements import ColumnElement
 
 from app.ctx import AppCtx
+from app.models import orm as m
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import ExceptionContext, Row
+    from sqlalchemy.types import TypeEngine
+
+logger = logging.getLogger(__name__)
+
+
+class _PreparedStatementLRU:
+    __slots__ = ("max_size", "statements")
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.statements: collections.OrderedDict[str, Any] = collections.OrderedDict()
+
+    def get(self, query: str) -> Any:
+        prepared_stmt = self.statements.get(query)
+        if prepared_stmt is not None:
+            self.statements.move_to_end(query)
+        return prepared_stmt
+
+    def put(self, query: str, prepared_stmt: Any) -> list[Any]:
+        """Returns the states of the evicted statements, to be closed."""
+        self.statements[query] = prepared_stmt
+
+        evicted_states = []
+        while len(self.statements) > self.max_size:
+            _, evicted_stmt = self.statements.popitem(last=False)
+            evicted_states.append(evicted_stmt._state)
+        return evicted_states
+
+    def clear(self) -> list[Any]:
+        """Returns the states of the dropped statements, to be closed."""
+        dropped_states = [stmt._state for stmt in self.statements.values()]
+        self.statements.clear()
+        return dropped_states
+
+
+def _schedule_close(connection: asyncpg.Connection, stmt_states: list[Any]) -> None:
+    # NOTE : a statement still used by a cursor is scheduled by asyncpg itself
+    #        once the cursor drops it, as it can't be closed before.
+    for stmt_state in stmt_states:
+        if stmt_state.refs == 0:
+            stmt_state.mark_closed()
+            connection._stmts_to_close.add(stmt_state)
+
+
+# pgbouncer-mode connection -> its prepared statements keyed by query
+_pgbouncer_statement_lrus: weakref.WeakKeyDictionary[
+    asyncpg.Connection, _PreparedStatementLRU
+] = weakref.WeakKeyDictionary()
+
+# `invalid_sql_statement_name`, `duplicate_prepared_statement` and
+# `feature_not_supported`(cached plan must not change result type)
+_STALE_STATEMENT_SQLSTATES = frozenset(["26000", "42P05", "0A000"])
+
+
+def is_stale_statement_error(err: sqlalchemy.exc.DBAPIError) -> bool:
+    """Whether `err` is raised by a prepared statement which the server no
+    longer has or no longer matches, so running its transaction again works.
+    """
+    return getattr(err.orig, "sqlstate", None) in _STALE_STATEMENT_SQLSTATES
+
+
+def _hashed_statement_name(query: str) -> str:
+    return "__sqla_%s" % hashlib.blake2b(query.encode(), digest_size=16).hexdigest()
 
 
 async def _asyncpg_prepare(  # type: ignore
@@ -28,51 +119,140 @@ async def _asyncpg_prepare(  # type: ignore
     timeout=None,
     record_class=None,
 ):
-    return await self._prepare(
-        query,
-        name=str(uuid.uuid1()) if name is None else name,  # hotfix
-        timeout=timeout,
-        use_cache=False,
-        record_class=record_class,
-    )
+    statement_lru = _pgbouncer_statement_lrus.get(self)
+
+    if statement_lru is None or name is not None or record_class is not None:
+        return await self._prepare(
+            query,
+            name=str(uuid.uuid1()) if name is None else name,  # hotfix
+            timeout=timeout,
+            use_cache=False,
+            record_class=record_class,
+        )
+
+    prepared_stmt = statement_lru.get(query)
+    if prepared_stmt is None:
+        # the statements dropped since are closed before preparing, as one of
+        # them may have the same name
+        if self._stmts_to_close:
+            await self._cleanup_stmts()
+
+        prepared_stmt = await self._prepare(
+            query,
+            name=_hashed_statement_name(query),
+            timeout=timeout,
+            use_cache=False,
+        )
+
+        _schedule_close(self, statement_lru.put(query, prepared_stmt))
+        if self._stmts_to_close:
+            await self._cleanup_stmts()
+
+    return prepared_stmt
 
 
 class SqlaEngineAndSession:
-    def __init__(self, db_uri: str, db_options: dict[str, Any]) -> None:
-        self.engine: AsyncEngine = create_async_engine(
-            db_uri,
-            connect_args={
+    def __init__(
+        self,
+        db_uri: str,
+        db_options: dict[str, Any],
+        prepared_statement_mode: Literal["disabled", "pgbouncer", "direct"] = (
+            "disabled"
+        ),
+        prepared_statement_cache_size: int = 100,
+    ) -> None:
+        if prepared_statement_mode == "direct":
+            connect_args = {
+                "prepared_statement_cache_size": prepared_statement_cache_size,
+            }
+        else:
+            connect_args = {
                 # to disable SQLA's statement cache for `.prepare()`
                 "prepared_statement_cache_size": 0,
                 # to disable asyncpg's statement cache for `.execute()`
                 "statement_cache_size": 0,
-            },
+            }
+
+        self.engine: AsyncEngine = create_async_engine(
+            db_uri,
+            connect_args=connect_args,
             **db_options,
         )
 
         # hotfix for `https://github.com/sqlalchemy/sqlalchemy/issues/6467`
         asyncpg.Connection.prepare = _asyncpg_prepare
 
-        self._scoped_session = async_scoped_session(
-            async_sessionmaker(
-                self.engine,
-                class_=AsyncSession,
-                autocommit=False,
-                autoflush=False,
-                expire_on_commit=False,
-            ),
-            # NOTE : we cannot use `asyncio.current_task` because starlette
-            #        schedules HTTPMiddleware and routing function in different
-            #        tasks.
-            scopefunc=lambda: AppCtx.current.ctx_id,
+        if prepared_statement_mode == "pgbouncer":
+            # NOTE : statements are cached by `_asyncpg_prepare` under the hash
+            #        of their SQL, which pgbouncer(>= 1.21, with
+            #        `max_prepared_statements`) maps onto whichever server
+            #        connection the transaction lands on.
+            def _on_connect(dbapi_connection: Any, _: Any) -> None:
+                _pgbouncer_statement_lrus[
+                    dbapi_connection.driver_connection
+                ] = _PreparedStatementLRU(prepared_statement_cache_size)
+
+            def _on_handle_error(exc_ctx: ExceptionContext) -> None:
+                if (
+                    getattr(exc_ctx.original_exception, "sqlstate", None)
+                    not in _STALE_STATEMENT_SQLSTATES
+                    or exc_ctx.connection is None
+                ):
+                    return
+
+                # the failed transaction is lost anyway, so make the following
+                # ones on this connection prepare their statements again
+                driver_connection = exc_ctx.connection.connection.driver_connection
+                statement_lru = _pgbouncer_statement_lrus.get(driver_connection)
+                if statement_lru is not None:
+                    _schedule_close(driver_connection, statement_lru.clear())
+
+            sa_event.listen(self.engine.sync_engine, "connect", _on_connect)
+            sa_event.listen(self.engine.sync_engine, "handle_error", _on_handle_error)
+
+        self._sessionmaker = async_sessionmaker(
+            self.engine,
+            class_=AsyncSession,
+            autocommit=False,
+            autoflush=False,
+            expire_on_commit=False,
         )
 
+        # NOTE : a mutable slot is bound instead of the session itself, so that
+        #        a session lazily created in a sync dependency or in a
+        #        `StreamingResponse` iterator(which run in copied contexts) is
+        #        still released by `bind_app_ctx`.
+        self._session_slot_var: contextvars.ContextVar[
+            list[AsyncSession | None]
+        ] = contextvars.ContextVar("_session_slot_var")
+
     @property
     def session(self) -> AsyncSession:
-        return self._scoped_session()
+        """The session of the current `bind_app_ctx()` scope.
 
-    async def clear_scoped_session(self) -> None:
-        await self._scoped_session.remove()
+        It is created, and checks out a connection, only on the first use.
+        """
+        session_slot = self._session_slot_var.get()
+        session = session_slot[0]
+        if session is None:
+            session = session_slot[0] = self._sessionmaker()
+        return session
+
+    def bind_session_slot(self) -> contextvars.Token[list[AsyncSession | None]]:
+        return self._session_slot_var.set([None])
+
+    def reset_session_slot(
+        self, token: contextvars.Token[list[AsyncSession | None]]
+    ) -> None:
+        self._session_slot_var.reset(token)
+
+    async def release_session(self) -> None:
+        session_slot = self._session_slot_var.get(None)
+        if session_slot is None or session_slot[0] is None:
+            return
+
+        session, session_slot[0] = session_slot[0], None
+        await session.close()
 
 
 async def obtain_advisory_lock(ident: str, timeout: float = 5.0) -> None:
@@ -102,3 +282,271 @@ async def obtain_advisory_lock(ident: str, timeout: float = 5.0) -> None:
 
     else:
         raise RuntimeError(f"failed to obtain the advisory lock (ident: {ident})")
+
+
+def encode_keyset_cursor(created: datetime.datetime, id_: uuid.UUID) -> str:
+    return (
+        base64.urlsafe_b64encode(f"{created.isoformat()}|{id_.hex}".encode())
+        .decode()
+        .rstrip("=")
+    )
+
+
+def decode_keyset_cursor(cursor: str) -> tuple[datetime.datetime, uuid.UUID]:
+    """Raises `ValueError` if the given cursor is malformed."""
+    created_iso, id_hex = (
+        base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split("|")
+    )
+
+    created = datetime.datetime.fromisoformat(created_iso)
+    if created.tzinfo is None:
+        raise ValueError(f"cursor without timezone (cursor: {cursor})")
+
+    return created, uuid.UUID(id_hex)
+
+
+def keyset_after(
+    created_column: Any,
+    id_column: Any,
+    cursor: tuple[datetime.datetime, uuid.UUID],
+) -> ColumnElement[bool]:
+    created, id_ = cursor
+
+    # NOTE : spelled out instead of `tuple_(created, id) > tuple_(...)` so the
+    #        leading `created >= ...` can be used as a range condition on the
+    #        single-column `created` index.
+    return sa_exp.and_(
+        created_column >= created,
+        sa_exp.or_(created_column > created, id_column > id_),
+    )
+
+
+def uuid_array(values: Iterable[uuid.UUID]) -> ColumnElement[list[uuid.UUID]]:
+    """Binds the given ids as one `UUID[]` parameter, e.g. for `id = ANY(...)`"""
+    # `ARRAY` is typed for any sequence, while its items are `UUID` here
+    array_type = cast(
+        "TypeEngine[list[uuid.UUID]]",
+        pg_dialect.ARRAY(pg_dialect.UUID(as_uuid=True)),
+    )
+    return sa_exp.literal(list(values), array_type)
+
+
+async def read_rows(query: sa_exp.Select) -> Sequence[Row[Any]]:
+    """Runs a query of columns, e.g. `select(Model.id, Model.name)`, on the
+    connection of the current session without the ORM.
+
+    The rows are plain named tuples. No instance is built, put in the identity
+    map or tracked for changes, which is what a large read pays the most for.
+    """
+    connection = await AppCtx.current.db.session.connection()
+    return (await connection.execute(query)).all()
+
+
+_FOREIGN_KEY_VIOLATION_SQLSTATE = "23503"
+
+
+def find_missing_parent(
+    err: sqlalchemy.exc.IntegrityError,
+    model: type[Any],
+) -> str | None:
+    """Returns the name of the parent model which `err` failed to reference.
+
+    `None` if `err` is not a foreign key violation on the table of `model`.
+    """
+    if getattr(err.orig, "sqlstate", None) != _FOREIGN_KEY_VIOLATION_SQLSTATE:
+        return None
+
+    # the original asyncpg error is chained to the DBAPI-adapted one
+    constraint_name = getattr(
+        getattr(err.orig, "__cause__", None), "constraint_name", None
+    )
+
+    for constraint in model.__table__.foreign_key_constraints:
+        if constraint.name != constraint_name:
+            continue
+
+        for mapper in model.registry.mappers:
+            if mapper.local_table is constraint.referred_table:
+                return mapper.class_.__name__  # type: ignore
+
+    return None
+
+
+class NotifiedCache(abc.ABC):
+    """Base of per-worker caches which other workers keep fresh with NOTIFY.
+
+    A cache must not serve while `is_listening` is False, as notifications sent
+    in the meantime are lost.
+    """
+
+    channel: str
+
+    def __init__(self) -> None:
+        self.is_listening = False
+
+        # bumped on every change, to discard values loaded before the change
+        self.version = 0
+
+    @abc.abstractmethod
+    def on_notify(self, payload: str) -> None:
+        """Applies a notification of `channel`, sent by any worker."""
+
+    def reset(self) -> None:
+        self.version += 1
+
+
+_NOTIFIED_CACHES: list[NotifiedCache] = []
+
+
+def register_notified_cache(cache: NotifiedCache) -> None:
+    _NOTIFIED_CACHES.append(cache)
+
+
+async def notify(channel: str, payload: str) -> None:
+    """Sends a notification when the current transaction is committed."""
+    await AppCtx.current.db.session.execute(
+        sa_exp.select(sa_func.pg_notify(channel, payload))
+    )
+
+
+async def notify_many(channel: str, payloads: list[str]) -> None:
+    """Sends notifications in order when the current transaction is committed."""
+    payload = sa_func.unnest(
+        sa_exp.literal(payloads, pg_dialect.ARRAY(sa_types.String))
+    ).column_valued("payload")
+
+    await AppCtx.current.db.session.execute(
+        sa_exp.select(sa_func.pg_notify(channel, payload))
+    )
+
+
+class PgNotificationListener:
+    # NOTE : LISTEN holds a session of the server, so it has to bypass
+    #        pgbouncer's transaction pooling (see `AppSettings.DB_LISTEN_URI`).
+    def __init__(self, db_uri: str, reconnect_delay: float = 5.0) -> None:
+        self._dsn = make_url(db_uri).set(drivername="postgresql")
+        self._reconnect_delay = reconnect_delay
+        self._task: asyncio.Task[None] | None = None
+        self._is_stopping = False
+
+    async def start(self) -> None:
+        if _NOTIFIED_CACHES:
+            self._is_stopping = False
+            self._task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            # NOTE : asyncpg may swallow the cancellation while connecting, so
+            #        the task also checks the flag before waiting for anything.
+            self._is_stopping = True
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _listen_forever(self) -> None:
+        caches_by_channel: dict[str, list[NotifiedCache]] = collections.defaultdict(
+            list
+        )
+        for cache in _NOTIFIED_CACHES:
+            caches_by_channel[cache.channel].append(cache)
+
+        def _on_notify(_conn: Any, _pid: int, channel: str, payload: str) -> None:
+            for cache in caches_by_channel[channel]:
+                try:
+                    cache.on_notify(payload)
+                except Exception:
+                    logger.warning(
+                        "Failed to apply a notification (channel: %s)",
+                        channel,
+                        exc_info=True,
+                    )
+                    cache.reset()
+
+        while not self._is_stopping:
+            try:
+                conn = await asyncpg.connect(
+                    self._dsn.render_as_string(hide_password=False)
+                )
+            except Exception:
+                logger.warning("Failed to connect for LISTEN", exc_info=True)
+                await asyncio.sleep(self._reconnect_delay)
+                continue
+
+            terminated = asyncio.Event()
+            conn.add_termination_listener(
+                lambda _, terminated=terminated: terminated.set()
+            )
+
+            try:
+                for channel in caches_by_channel:
+                    await conn.add_listener(channel, _on_notify)
+
+                if self._is_stopping:
+                    return
+
+                for cache in _NOTIFIED_CACHES:
+                    cache.reset()
+                    cache.is_listening = True
+
+                await terminated.wait()
+                logger.warning("LISTEN connection is terminated")
+
+            except Exception:
+                logger.warning("Failed to LISTEN", exc_info=True)
+
+            finally:
+                for cache in _NOTIFIED_CACHES:
+                    cache.is_listening = False
+                    cache.reset()
+
+                if not conn.is_closed():
+                    await conn.close()
+
+            await asyncio.sleep(self._reconnect_delay)
+
+
+def table_version_bump(name: str) -> Insert:
+    """The upsert bumping the `CatalogVersion` of a table, returning it."""
+    upsert_query: Insert = (
+        pg_dialect.insert(m.CatalogVersion)
+        .values(name=name, version=1, created=sa_func.now())
+        .on_conflict_do_update(
+            index_elements=[m.CatalogVersion.name],
+            set_={
+                "version": m.CatalogVersion.version + 1,
+                "modified": sa_func.now(),
+            },
+        )
+        .returning(m.CatalogVersion.version)
+    )
+    return upsert_query
+
+
+async def bump_table_version(name: str) -> int:
+    """Bumps the `CatalogVersion` of a table in the current transaction.
+
+    The version row stays locked until the commit, so that every write to the
+    table is serialized on it. Bump it right before the commit, to hold the lock
+    as briefly as possible.
+    """
+    return (  # type: ignore[no-any-return]
+        await AppCtx.current.db.session.execute(table_version_bump(name))
+    ).scalar_one()
+
+
+def table_version_etag(name: str) -> Callable[[], Awaitable[str]]:
+    """Validator of a whole table, for `CustomAPIRouter.api_wrapper(etag=...)`.
+
+    Reads the version row maintained by `bump_table_version()` only, so the
+    table itself is not touched.
+    """
+    version_query = sa_exp.select(m.CatalogVersion.version).where(
+        m.CatalogVersion.name == name
+    )
+
+    async def _etag() -> str:
+        version = (await AppCtx.current.db.session.execute(version_query)).scalar()
+        return str(version or 0)
+
+    return _etag
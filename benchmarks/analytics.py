@@ -0,0 +1,131 @@
+"""Training trends of a synthetic history, per row and vectorized.
+
+    python -m benchmarks.analytics [rows]
+
+Compares a Python loop over log objects with `compute_trends()` on the same
+columns. No database connection is made.
+"""
+from __future__ import annotations
+
+import collections
+import sys
+import time
+import uuid
+from typing import NamedTuple
+
+import numpy as np
+
+from app.apis.analytics import TrainingColumns, Trends, compute_trends
+
+_CATEGORIES = 20
+_DAYS = 3 * 365
+_WINDOW = 7
+
+
+class _Log(NamedTuple):
+    exercise_category_id: uuid.UUID
+    day: int
+    weight: int
+    reps: int
+
+
+def _synthesize(rows: int) -> TrainingColumns:
+    rng = np.random.default_rng(0)
+
+    category_codes = np.sort(rng.integers(0, _CATEGORIES, rows))
+    days = 19_000 + rng.integers(0, _DAYS, rows)
+
+    return TrainingColumns(
+        exercise_category_ids=[uuid.uuid4() for _ in range(_CATEGORIES)],
+        category_codes=category_codes,
+        days=days,
+        weights=20 + (days - 19_000) // 30 + rng.integers(0, 40, rows),
+        counts=rng.integers(1, 13, rows),
+    )
+
+
+def _compute_trends_per_row(logs: list[_Log], window: int) -> Trends:
+    daily_volumes: dict[int, int] = collections.defaultdict(int)
+    weekly_volumes: dict[int, int] = collections.defaultdict(int)
+    points: dict[uuid.UUID, list[tuple[float, float]]] = collections.defaultdict(list)
+
+    first_day = min(log.day for log in logs)
+    for log in logs:
+        daily_volumes[log.day] += log.weight * log.reps
+        weekly_volumes[(log.day + 3) // 7] += log.weight * log.reps
+        points[log.exercise_category_id].append(
+            ((log.day - first_day) / 7, float(log.weight))
+        )
+
+    last_day = max(daily_volumes)
+    rolling_volumes = []
+    for day in range(first_day, last_day + 1):
+        days_in_window = range(max(day - window + 1, first_day), day + 1)
+        rolling_volumes.append(
+            sum(daily_volumes[d] for d in days_in_window) / len(days_in_window)
+        )
+
+    first_week, last_week = min(weekly_volumes), max(weekly_volumes)
+    weeks = [weekly_volumes[week] for week in range(first_week, last_week + 1)]
+    week_over_week_changes = [float("nan")] + [
+        (current - previous) / previous if previous > 0 else float("nan")
+        for previous, current in zip(weeks, weeks[1:])
+    ]
+
+    slopes = []
+    log_counts = []
+    for category_points in points.values():
+        n = len(category_points)
+        mean_x = sum(x for x, _ in category_points) / n
+        mean_y = sum(y for _, y in category_points) / n
+        covariance = sum((x - mean_x) * (y - mean_y) for x, y in category_points)
+        variance = sum((x - mean_x) ** 2 for x, _ in category_points)
+        slopes.append(covariance / variance if variance > 0 else float("nan"))
+        log_counts.append(n)
+
+    return Trends(
+        first_day=first_day,
+        rolling_volumes=np.array(rolling_volumes),
+        first_week=first_week,
+        weekly_volumes=np.array(weeks, dtype=np.float64),
+        week_over_week_changes=np.array(week_over_week_changes),
+        progression_slopes=np.array(slopes),
+        log_counts=np.array(log_counts),
+    )
+
+
+def main(rows: int) -> None:
+    columns = _synthesize(rows)
+    logs = [
+        _Log(columns.exercise_category_ids[code], day, weight, count)
+        for code, day, weight, count in zip(
+            columns.category_codes.tolist(),
+            columns.days.tolist(),
+            columns.weights.tolist(),
+            columns.counts.tolist(),
+        )
+    ]
+
+    started = time.perf_counter()
+    per_row = _compute_trends_per_row(logs, _WINDOW)
+    per_row_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    vectorized = compute_trends(columns, _WINDOW)
+    vectorized_elapsed = time.perf_counter() - started
+
+    for field in vectorized._fields:
+        assert np.allclose(
+            getattr(per_row, field), getattr(vectorized, field), equal_nan=True
+        )
+
+    print(f"rows       : {rows:10d}")
+    print(f"per row    : {per_row_elapsed * 1000:10.1f} ms")
+    print(
+        f"vectorized : {vectorized_elapsed * 1000:10.1f} ms "
+        f"({per_row_elapsed / vectorized_elapsed:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
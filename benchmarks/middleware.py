@@ -0,0 +1,112 @@
+"""Requests per second of a small endpoint through the `AppCtx` middleware.
+
+    python -m benchmarks.middleware [requests]
+
+Compares `AppCtxMiddleware` with the former `BaseHTTPMiddleware` based
+binding. No database connection is made.
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+import uuid
+
+from fastapi import FastAPI, Request, Response
+from pydantic import BaseModel
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.types import Message
+
+from app.ctx import AppCtx, bind_app_ctx, create_app_ctx
+from app.settings import AppSettings
+from app.utils.fastapi import AppCtxMiddleware, ErrorReportAndForgetMiddleware
+
+
+class _BenchResponse(BaseModel):
+    id: uuid.UUID | None
+
+
+async def _bench_routing() -> _BenchResponse:
+    return _BenchResponse(id=None)
+
+
+async def _legacy_ctx_middleware(
+    request: Request, call_next: RequestResponseEndpoint
+) -> Response:
+    app_ctx: AppCtx = request.app.extra["_app_ctx"]
+    async with bind_app_ctx(app_ctx):
+        response = await call_next(request)
+    return response
+
+
+def _build_app(app_ctx: AppCtx, legacy: bool) -> FastAPI:
+    app = FastAPI()
+    app.extra["_app_ctx"] = app_ctx
+
+    if legacy:
+        app.add_middleware(ErrorReportAndForgetMiddleware)
+        app.add_middleware(BaseHTTPMiddleware, dispatch=_legacy_ctx_middleware)
+    else:
+        app.add_middleware(AppCtxMiddleware)
+
+    app.get("/bench", response_model=_BenchResponse)(_bench_routing)
+
+    return app
+
+
+async def _measure(app: FastAPI, requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/bench",
+        "raw_path": b"/bench",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [],
+        "client": ("127.0.0.1", 10000),
+        "server": ("bench", 80),
+    }
+
+    async def _request() -> None:
+        body_received = False
+
+        async def _receive() -> Message:
+            nonlocal body_received
+            if body_received:
+                await asyncio.Event().wait()  # never disconnects
+            body_received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def _send(message: Message) -> None:
+            pass
+
+        await app(dict(scope), _receive, _send)
+
+    for _ in range(requests // 10):
+        await _request()
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await _request()
+
+    return requests / (time.perf_counter() - started)
+
+
+async def main(requests: int) -> None:
+    app_ctx = await create_app_ctx(AppSettings())
+
+    try:
+        before = await _measure(_build_app(app_ctx, legacy=True), requests)
+        after = await _measure(_build_app(app_ctx, legacy=False), requests)
+    finally:
+        await app_ctx.db.engine.dispose()
+
+    print(f"BaseHTTPMiddleware : {before:10.1f} req/s")
+    print(f"AppCtxMiddleware   : {after:10.1f} req/s ({after / before:.2f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000))
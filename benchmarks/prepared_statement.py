@@ -0,0 +1,68 @@
+"""Per-query latency for each `DB_PREPARED_STATEMENT_MODE`.
+
+    python -m benchmarks.prepared_statement [iterations]
+
+Connects with the `app_DB_URI` of the current environment. Point it at
+pgbouncer to compare `disabled` with `pgbouncer`, or at PostgreSQL itself to
+compare all three modes.
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+from sqlalchemy.sql import expression as sa_exp
+
+from app.models import orm as m
+from app.settings import AppSettings
+from app.utils.sqla import SqlaEngineAndSession
+
+_WARMUP_ITERATIONS = 100
+
+
+async def _measure(app_settings: AppSettings, mode: str, iterations: int) -> float:
+    db = SqlaEngineAndSession(
+        app_settings.DB_URI,
+        app_settings.DB_OPTIONS,
+        prepared_statement_mode=mode,  # type: ignore
+        prepared_statement_cache_size=app_settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+    )
+
+    # same shape as a page of `performance_log_list`
+    query = (
+        sa_exp.select(m.PerformanceLog)
+        .order_by(m.PerformanceLog.created.asc(), m.PerformanceLog.id.asc())
+        .limit(10)
+    )
+
+    try:
+        async with db.engine.connect() as conn:
+            for _ in range(_WARMUP_ITERATIONS):
+                await conn.execute(query)
+
+            started = time.perf_counter()
+            for _ in range(iterations):
+                await conn.execute(query)
+
+            return (time.perf_counter() - started) / iterations
+    finally:
+        await db.engine.dispose()
+
+
+async def main(iterations: int) -> None:
+    app_settings = AppSettings()
+
+    baseline = await _measure(app_settings, "disabled", iterations)
+    print(f"{'disabled':>10} : {baseline * 1e6:8.1f} us/query")
+
+    for mode in ("pgbouncer", "direct"):
+        latency = await _measure(app_settings, mode, iterations)
+        print(
+            f"{mode:>10} : {latency * 1e6:8.1f} us/query "
+            f"(saved {(baseline - latency) * 1e6:.1f} us/query)"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000))
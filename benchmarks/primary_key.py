@@ -0,0 +1,95 @@
+"""Insert throughput and primary key index size, random vs time-ordered ids.
+
+    python -m benchmarks.primary_key [rows]
+
+Connects with the `app_DB_URI` of the current environment, and inserts the
+same rows into a scratch table keyed by `uuid.uuid4()` and by `uuid7()`. The
+table is dropped afterwards.
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+import uuid
+from typing import Callable
+
+from sqlalchemy.sql import expression as sa_exp
+
+from app.models import orm as m
+from app.settings import AppSettings
+from app.utils.sqla import SqlaEngineAndSession
+
+_BATCH_SIZE = 1_000
+_TABLE_NAME = "benchmark_primary_key"
+
+
+async def _measure(
+    app_settings: AppSettings, new_id: Callable[[], uuid.UUID], rows: int
+) -> tuple[float, int]:
+    db = SqlaEngineAndSession(app_settings.DB_URI, app_settings.DB_OPTIONS)
+
+    try:
+        async with db.engine.connect() as conn:
+            await conn.execute(sa_exp.text(f"DROP TABLE IF EXISTS {_TABLE_NAME}"))
+            # same shape as `performance_log`
+            await conn.execute(
+                sa_exp.text(
+                    f"""
+                    CREATE TABLE {_TABLE_NAME} (
+                        id uuid PRIMARY KEY,
+                        weight integer NOT NULL,
+                        count integer NOT NULL,
+                        created timestamptz NOT NULL DEFAULT now()
+                    )
+                    """
+                )
+            )
+            await conn.commit()
+
+            insert_query = sa_exp.text(
+                f"INSERT INTO {_TABLE_NAME} (id, weight, count) "
+                "VALUES (:id, :weight, :count)"
+            )
+
+            started = time.perf_counter()
+            for start in range(0, rows, _BATCH_SIZE):
+                await conn.execute(
+                    insert_query,
+                    [
+                        {"id": new_id(), "weight": i % 200, "count": 10}
+                        for i in range(start, min(start + _BATCH_SIZE, rows))
+                    ],
+                )
+                await conn.commit()
+            elapsed = time.perf_counter() - started
+
+            index_size = (
+                await conn.execute(
+                    sa_exp.text(
+                        f"SELECT pg_relation_size('{_TABLE_NAME}_pkey'::regclass)"
+                    )
+                )
+            ).scalar_one()
+
+            await conn.execute(sa_exp.text(f"DROP TABLE {_TABLE_NAME}"))
+            await conn.commit()
+
+            return rows / elapsed, index_size
+    finally:
+        await db.engine.dispose()
+
+
+async def main(rows: int) -> None:
+    app_settings = AppSettings()
+
+    for name, new_id in (("uuid4", uuid.uuid4), ("uuid7", m.uuid7)):
+        throughput, index_size = await _measure(app_settings, new_id, rows)
+        print(
+            f"{name} : {throughput:10.0f} rows/s, "
+            f"primary key index {index_size / 2**20:8.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000))
@@ -0,0 +1,27 @@
+"""Recomputes every performance rollup from the performance logs.
+
+    python -m commands.rebuild_performance_rollup
+
+Changes of the performance logs wait until the rebuild is committed.
+"""
+from __future__ import annotations
+
+import asyncio
+
+from app.apis.performance_rollup import rebuild_rollups
+from app.ctx import bind_app_ctx, create_app_ctx
+from app.settings import AppSettings
+
+
+async def main() -> None:
+    app_ctx = await create_app_ctx(AppSettings())
+
+    try:
+        async with bind_app_ctx(app_ctx):
+            await rebuild_rollups()
+    finally:
+        await app_ctx.db.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
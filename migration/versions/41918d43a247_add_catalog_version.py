@@ -0,0 +1,42 @@
+"""add catalog_version
+
+Revision ID: 41918d43a247
+Revises: ac3eaebad1a6
+Create Date: 2026-10-18 16:12:40.511203
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "41918d43a247"
+down_revision = "ac3eaebad1a6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "catalog_version",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.Column("created", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("modified", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("name", name=op.f("pk_catalog_version")),
+    )
+    op.create_index(
+        op.f("ix_b5b374f93c265a73b5a8bf5f38fdc053"),
+        "catalog_version",
+        ["created"],
+        unique=False,
+    )
+    # ### end Alembic commands ###
+
+
+def downgrade():
+    op.drop_index(
+        op.f("ix_b5b374f93c265a73b5a8bf5f38fdc053"), table_name="catalog_version"
+    )
+    op.drop_table("catalog_version")
+    # ### end Alembic commands ###
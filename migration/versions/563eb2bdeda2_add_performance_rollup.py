@@ -0,0 +1,75 @@
+"""add performance_rollup
+
+Revision ID: 563eb2bdeda2
+Revises: 41918d43a247
+Create Date: 2026-10-18 18:02:11.305719
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "563eb2bdeda2"
+down_revision = "41918d43a247"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "performance_rollup",
+        sa.Column("period", sa.String(), nullable=False),
+        sa.Column("period_start", sa.Date(), nullable=False),
+        sa.Column("exercise_category_id", sa.UUID(), nullable=False),
+        sa.Column("volume", sa.BigInteger(), nullable=False),
+        sa.Column("set_count", sa.Integer(), nullable=False),
+        sa.Column("created", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("modified", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["exercise_category_id"],
+            ["exercise_category.id"],
+            name=op.f("fk_cdfb8972f8595847a2722c5794aef343"),
+        ),
+        sa.PrimaryKeyConstraint(
+            "period",
+            "period_start",
+            "exercise_category_id",
+            name=op.f("pk_performance_rollup"),
+        ),
+    )
+    op.create_index(
+        op.f("ix_ad980f22d3ee58f49ed7ac781241ac16"),
+        "performance_rollup",
+        ["created"],
+        unique=False,
+    )
+    # ### end Alembic commands ###
+
+    # backfill from the existing logs
+    op.execute(
+        """
+        INSERT INTO performance_rollup (
+            period, period_start, exercise_category_id, volume, set_count, created
+        )
+        SELECT
+            periods.period,
+            date_trunc(periods.period, daily_log.date::timestamp)::date,
+            performance_log.exercise_category_id,
+            sum(performance_log.weight::bigint * performance_log.count),
+            count(*),
+            now()
+        FROM performance_log
+        JOIN daily_log ON daily_log.id = performance_log.daily_log_id
+        CROSS JOIN (VALUES ('week'), ('month')) AS periods (period)
+        GROUP BY 1, 2, 3
+        """
+    )
+
+
+def downgrade():
+    op.drop_index(
+        op.f("ix_ad980f22d3ee58f49ed7ac781241ac16"), table_name="performance_rollup"
+    )
+    op.drop_table("performance_rollup")
+    # ### end Alembic commands ###
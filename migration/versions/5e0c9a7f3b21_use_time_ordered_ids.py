@@ -0,0 +1,69 @@
+"""use time-ordered ids
+
+Revision ID: 5e0c9a7f3b21
+Revises: d2b7a4e91c05
+Create Date: 2026-10-18 21:12:54.806132
+
+The app issues version 7 UUIDs itself, and `uuid_generate_v7()` becomes the
+server default for the rows inserted by SQL only. Existing ids are kept as
+they are. Rewriting them would cascade to every foreign key, while the new
+ids are appended after them in the indexes anyway.
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "5e0c9a7f3b21"
+down_revision = "d2b7a4e91c05"
+branch_labels = None
+depends_on = None
+
+_TABLE_NAMES = ("daily_log", "exercise_category", "performance_log")
+
+# NOTE : a copy of `app.models.orm.base_.UUID_GENERATE_V7_DDL`, which the
+#        metadata creates on a fresh database. Kept here, as the migration must
+#        not change with the app.
+_UUID_GENERATE_V7_SQL = """
+    CREATE OR REPLACE FUNCTION uuid_generate_v7() RETURNS uuid AS $$
+        SELECT encode(
+            set_bit(
+                set_bit(
+                    overlay(
+                        uuid_send(gen_random_uuid())
+                        PLACING substring(
+                            int8send(
+                                floor(
+                                    extract(epoch FROM clock_timestamp()) * 1000
+                                )::bigint
+                            )
+                            FROM 3
+                        )
+                        FROM 1 FOR 6
+                    ),
+                    52, 1
+                ),
+                53, 1
+            ),
+            'hex'
+        )::uuid
+    $$ LANGUAGE SQL VOLATILE
+    """
+
+
+def upgrade():
+    op.execute(_UUID_GENERATE_V7_SQL)
+
+    for table_name in _TABLE_NAMES:
+        op.execute(
+            f"ALTER TABLE {table_name} ALTER COLUMN id SET DEFAULT uuid_generate_v7()"
+        )
+
+
+def downgrade():
+    for table_name in _TABLE_NAMES:
+        op.execute(
+            f"ALTER TABLE {table_name} ALTER COLUMN id SET DEFAULT uuid_generate_v4()"
+        )
+
+    op.execute("DROP FUNCTION uuid_generate_v7()")
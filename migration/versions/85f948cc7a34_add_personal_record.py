@@ -0,0 +1,61 @@
+"""add personal_record
+
+Revision ID: 85f948cc7a34
+Revises: 563eb2bdeda2
+Create Date: 2026-10-18 19:24:37.118406
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "85f948cc7a34"
+down_revision = "563eb2bdeda2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "personal_record",
+        sa.Column("exercise_category_id", sa.UUID(), nullable=False),
+        sa.Column("weight", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("created", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("modified", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["exercise_category_id"],
+            ["exercise_category.id"],
+            name=op.f("fk_3b43398eca2a5f9999f2ee01aad6ce12"),
+        ),
+        sa.PrimaryKeyConstraint(
+            "exercise_category_id", "weight", name=op.f("pk_personal_record")
+        ),
+    )
+    op.create_index(
+        op.f("ix_250b584ed7945b459d0719c1c7e05cec"),
+        "personal_record",
+        ["created"],
+        unique=False,
+    )
+    # ### end Alembic commands ###
+
+    # backfill from the existing logs
+    op.execute(
+        """
+        INSERT INTO personal_record (exercise_category_id, weight, count, created)
+        SELECT exercise_category_id, weight, max(count), now()
+        FROM performance_log
+        WHERE count > 0
+        GROUP BY 1, 2
+        """
+    )
+
+
+def downgrade():
+    op.drop_index(
+        op.f("ix_250b584ed7945b459d0719c1c7e05cec"), table_name="personal_record"
+    )
+    op.drop_table("personal_record")
+    # ### end Alembic commands ###
@@ -0,0 +1,88 @@
+"""add account
+
+Revision ID: 9b4d2f6c8e17
+Revises: 5e0c9a7f3b21
+Create Date: 2026-10-18 23:05:31.274915
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9b4d2f6c8e17"
+down_revision = "5e0c9a7f3b21"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "account",
+        sa.Column(
+            "id",
+            sa.UUID(),
+            server_default=sa.text("uuid_generate_v7()"),
+            nullable=False,
+        ),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("password", sa.String(), nullable=False),
+        sa.Column("fullname", sa.String(length=128), nullable=False),
+        sa.Column("introduction", sa.Text(), nullable=False),
+        sa.Column("created", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("modified", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_account")),
+        sa.UniqueConstraint(
+            "username", name=op.f("uq_ecac4fd2482f5973957e2c34170363a9")
+        ),
+    )
+    op.create_index(
+        op.f("ix_4e185986f4bd55eca3ceb40991519a4c"),
+        "account",
+        ["created"],
+        unique=False,
+    )
+    op.create_table(
+        "account_login",
+        sa.Column(
+            "id",
+            sa.UUID(),
+            server_default=sa.text("uuid_generate_v7()"),
+            nullable=False,
+        ),
+        sa.Column("ipaddr", sa.String(), nullable=False),
+        sa.Column("account_id", sa.UUID(), nullable=False),
+        sa.Column("created", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("modified", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["account_id"],
+            ["account.id"],
+            name=op.f("fk_6009890ca2935812870320d3ec76e759"),
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_account_login")),
+    )
+    op.create_index(
+        op.f("ix_bc6521d9e2af583b86e0f51e267d99cd"),
+        "account_login",
+        ["account_id", "created"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_4af6b6ab96a5501198b5b3ab0b29618e"),
+        "account_login",
+        ["created"],
+        unique=False,
+    )
+    # ### end Alembic commands ###
+
+
+def downgrade():
+    op.drop_index(
+        op.f("ix_4af6b6ab96a5501198b5b3ab0b29618e"), table_name="account_login"
+    )
+    op.drop_index(
+        op.f("ix_bc6521d9e2af583b86e0f51e267d99cd"), table_name="account_login"
+    )
+    op.drop_table("account_login")
+    op.drop_index(op.f("ix_4e185986f4bd55eca3ceb40991519a4c"), table_name="account")
+    op.drop_table("account")
+    # ### end Alembic commands ###
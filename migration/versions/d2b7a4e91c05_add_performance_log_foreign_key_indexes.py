@@ -0,0 +1,51 @@
+"""add performance_log foreign key indexes
+
+Revision ID: d2b7a4e91c05
+Revises: 85f948cc7a34
+Create Date: 2026-10-18 20:41:09.527384
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "d2b7a4e91c05"
+down_revision = "85f948cc7a34"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # NOTE : built without locking the writes of `performance_log` out, which
+    #        can not run inside the transaction of the migration.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f("ix_a9013420a91f5462af1de0e229b279cc"),
+            "performance_log",
+            ["daily_log_id", "created"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            op.f("ix_dc0533a8781b53159c4c194908263e61"),
+            "performance_log",
+            ["exercise_category_id", "created"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+    # ### end Alembic commands ###
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f("ix_dc0533a8781b53159c4c194908263e61"),
+            table_name="performance_log",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            op.f("ix_a9013420a91f5462af1de0e229b279cc"),
+            table_name="performance_log",
+            postgresql_concurrently=True,
+        )
+    # ### end Alembic commands ###
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+import pytest_asyncio
+
+from tests.helper import ensure_fresh_env, with_app_ctx
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+
+    from app.settings import AppSettings
+
+
+@pytest.mark.asyncio
+class TestApisAnalytics:
+    @pytest_asyncio.fixture(autouse=True, scope="class")
+    async def _init_db(self, app_settings: AppSettings) -> None:
+        async with with_app_ctx(app_settings):
+            await ensure_fresh_env()
+
+            # do DB mocking here
+            pass
+
+    async def test_trends_get_routing(self, app_client: AsyncClient) -> None:
+        # Case : no log
+
+        r = await app_client.get("/analytics/trends")
+        assert r.status_code == 200
+        assert r.json()["dates"] == []
+        assert r.json()["categories"] == []
+
+        # Case : logs of one day
+
+        r = await app_client.post("/exercise/category", json={"name": "squat"})
+        assert r.status_code == 200
+        exercise_category_id = r.json()["id"]
+
+        r = await app_client.post("/daily/log")
+        assert r.status_code == 200
+        daily_log_id = r.json()["id"]
+
+        for weight in (60, 80):
+            r = await app_client.post(
+                "/performance/log",
+                json={
+                    "count": 10,
+                    "weight": weight,
+                    "exercise_category_id": exercise_category_id,
+                    "daily_log_id": daily_log_id,
+                },
+            )
+            assert r.status_code == 200
+
+        r = await app_client.get("/analytics/trends")
+        assert r.status_code == 200
+        assert len(r.json()["dates"]) == 1
+        assert r.json()["rolling_volumes"] == [1_400.0]
+        assert r.json()["weekly_volumes"] == [1_400]
+        assert r.json()["week_over_week_changes"] == [None]
+        assert r.json()["categories"] == [
+            {
+                "exercise_category_id": exercise_category_id,
+                "log_count": 2,
+                "slope": None,
+            }
+        ]
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import binascii
+import hashlib
 from typing import TYPE_CHECKING
 
 import pytest
 import pytest_asyncio
+from sqlalchemy.sql import expression as sa_exp
 
+from app.ctx import AppCtx
+from app.models import orm as m
 from tests.helper import ensure_fresh_env, with_app_ctx
 
 if TYPE_CHECKING:
@@ -20,8 +25,23 @@ class TestApisAuth:
         async with with_app_ctx(app_settings):
             await ensure_fresh_env()
 
-            # do DB mocking here
-            pass
+            # hashed in the `<salt hex>:<hash hex>` format of 100,000 iterations
+            pbkdf2_salt = b"legacysaltlegacy"
+            pw_hash = hashlib.pbkdf2_hmac(
+                "SHA256", b"asdfqwer1234", pbkdf2_salt, 100_000
+            )
+            AppCtx.current.db.session.add(
+                m.Account(
+                    username="legacyuser",
+                    password="%s:%s"
+                    % (
+                        binascii.hexlify(pbkdf2_salt).decode(),
+                        binascii.hexlify(pw_hash).decode(),
+                    ),
+                    fullname="legacy account",
+                )
+            )
+            await AppCtx.current.db.session.commit()
 
     async def test_signup_post_routing(self, app_client: AsyncClient) -> None:
         r = await app_client.post(
@@ -65,3 +85,28 @@ class TestApisAuth:
             data={"username": "testuser", "password": "asdfqwer1234"},
         )
         assert r.status_code == 200
+
+    async def test_login_post_rehash_routing(
+        self, app_settings: AppSettings, app_client: AsyncClient
+    ) -> None:
+        r = await app_client.post(
+            "/auth/login",
+            data={"username": "legacyuser", "password": "asdfqwer1234"},
+        )
+        assert r.status_code == 200
+
+        async with with_app_ctx(app_settings):
+            hashed_password = (
+                await AppCtx.current.db.session.execute(
+                    sa_exp.select(m.Account.password).where(
+                        m.Account.username == "legacyuser"
+                    )
+                )
+            ).scalar_one()
+        assert hashed_password.startswith("pbkdf2_sha256$")
+
+        r = await app_client.post(
+            "/auth/login",
+            data={"username": "legacyuser", "password": "asdfqwer1234"},
+        )
+        assert r.status_code == 200
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+import pytest
+import pytest_asyncio
+
+from app.apis import daily_log
+from tests.helper import ensure_fresh_env, record_statements, with_app_ctx
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+
+    from app.settings import AppSettings
+
+
+@pytest.mark.asyncio
+class TestApisDailyLog:
+    @pytest_asyncio.fixture(autouse=True, scope="class")
+    async def _init_db(self, app_settings: AppSettings) -> None:
+        async with with_app_ctx(app_settings):
+            await ensure_fresh_env()
+
+            # do DB mocking here
+            pass
+
+    async def test_today_get_routing(self, app_client: AsyncClient) -> None:
+        # the cache serves only once the LISTEN connection is up
+        for _ in range(50):
+            if daily_log._daily_log_id_by_date_cache.is_listening:
+                break
+            await asyncio.sleep(0.1)
+
+        # Case : polling before today's log is created
+
+        for expected_statement_count in (1, 0):
+            with record_statements() as statements:
+                r = await app_client.get("/daily/log/today")
+            assert r.status_code == 200
+            assert r.json() == {"id": None}
+            assert len(statements) == expected_statement_count
+
+        # Case : polling after today's log is created
+
+        r = await app_client.post("/daily/log")
+        assert r.status_code == 200
+        daily_log_id = r.json()["id"]
+
+        for _ in range(2):
+            with record_statements() as statements:
+                r = await app_client.get("/daily/log/today")
+            assert r.status_code == 200
+            assert r.json() == {"id": daily_log_id}
+            assert statements == []
+
+    async def test_detail_get_routing(self, app_client: AsyncClient) -> None:
+        r = await app_client.get("/daily/log/today")
+        assert r.status_code == 200
+        daily_log_id = r.json()["id"]
+
+        # Case : a day without logs
+
+        r = await app_client.get("/daily/log/:id/detail", params={"id": daily_log_id})
+        assert r.status_code == 200
+        assert r.json()["id"] == daily_log_id
+        assert r.json()["performance_logs"] == []
+
+        # Case : a day with logs
+
+        r = await app_client.post("/exercise/category", json={"name": "squat"})
+        assert r.status_code == 200
+        exercise_category_id = r.json()["id"]
+
+        for weight in (60, 70):
+            r = await app_client.post(
+                "/performance/log",
+                json={
+                    "count": 10,
+                    "weight": weight,
+                    "exercise_category_id": exercise_category_id,
+                    "daily_log_id": daily_log_id,
+                },
+            )
+            assert r.status_code == 200
+
+        r = await app_client.get("/daily/log/:id/detail", params={"id": daily_log_id})
+        assert r.status_code == 200
+        assert [log["weight"] for log in r.json()["performance_logs"]] == [60, 70]
+        assert r.json()["performance_logs"][0]["exercise_category_name"] == "squat"
+
+        # Case : missing day
+
+        r = await app_client.get(
+            "/daily/log/:id/detail",
+            params={"id": "cdf87aab1c38404c93f0d19157d67e55"},
+        )
+        assert r.status_code == 409
+        assert r.json()["code"] == "model_not_found"
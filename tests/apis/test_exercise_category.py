@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+import pytest_asyncio
+
+from tests.helper import ensure_fresh_env, with_app_ctx
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+
+    from app.settings import AppSettings
+
+
+@pytest.mark.asyncio
+class TestApisExerciseCategory:
+    @pytest_asyncio.fixture(autouse=True, scope="class")
+    async def _init_db(self, app_settings: AppSettings) -> None:
+        async with with_app_ctx(app_settings):
+            await ensure_fresh_env()
+
+            # do DB mocking here
+            pass
+
+    async def test_list_conditional_get_routing(self, app_client: AsyncClient) -> None:
+        r = await app_client.post("/exercise/category", json={"name": "squat"})
+        assert r.status_code == 200
+
+        r = await app_client.get("/exercise/category")
+        assert r.status_code == 200
+        etag = r.headers["ETag"]
+
+        # Case : nothing changed
+
+        r = await app_client.get("/exercise/category", headers={"If-None-Match": etag})
+        assert r.status_code == 304
+        assert r.headers["ETag"] == etag
+        assert r.content == b""
+
+        # Case : a category is created
+
+        r = await app_client.post("/exercise/category", json={"name": "bench press"})
+        assert r.status_code == 200
+
+        r = await app_client.get("/exercise/category", headers={"If-None-Match": etag})
+        assert r.status_code == 200
+        assert r.headers["ETag"] != etag
+        assert len(r.json()) == 2
+
+    async def test_patch_routing(self, app_client: AsyncClient) -> None:
+        r = await app_client.post("/exercise/category", json={"name": "deadlift"})
+        assert r.status_code == 200
+        exercise_category_id = r.json()["id"]
+
+        # Case : no field is set
+
+        r = await app_client.patch(
+            "/exercise/category/:id", params={"id": exercise_category_id}, json={}
+        )
+        assert r.status_code == 200
+        assert r.json()["name"] == "deadlift"
+
+        r = await app_client.get(
+            "/exercise/category/:id", params={"id": exercise_category_id}
+        )
+        assert r.status_code == 200
+        assert r.json()["name"] == "deadlift"
+
+        # Case : the name is set
+
+        r = await app_client.patch(
+            "/exercise/category/:id",
+            params={"id": exercise_category_id},
+            json={"name": "sumo deadlift"},
+        )
+        assert r.status_code == 200
+        assert r.json()["name"] == "sumo deadlift"
+
+        r = await app_client.get(
+            "/exercise/category/:id", params={"id": exercise_category_id}
+        )
+        assert r.status_code == 200
+        assert r.json()["name"] == "sumo deadlift"
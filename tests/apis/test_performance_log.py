@@ -0,0 +1,434 @@
+from __future__ import annotations
+
+import csv
+import datetime
+import io
+import json
+from typing import TYPE_CHECKING, Any
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event as sa_event
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import expression as sa_exp
+
+from app.apis import performance_log
+from app.ctx import AppCtx
+from app.models import orm as m
+from tests.helper import ensure_fresh_env, with_app_ctx
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+
+    from app.settings import AppSettings
+
+
+@pytest.mark.asyncio
+class TestApisPerformanceLog:
+    @pytest_asyncio.fixture(autouse=True, scope="class")
+    async def _init_db(self, app_settings: AppSettings) -> None:
+        async with with_app_ctx(app_settings):
+            await ensure_fresh_env()
+
+            # do DB mocking here
+            pass
+
+    @pytest_asyncio.fixture(scope="class")
+    async def exercise_category_id(self, app_client: AsyncClient) -> str:
+        r = await app_client.post("/exercise/category", json={"name": "squat"})
+        assert r.status_code == 200
+
+        return r.json()["id"]  # type: ignore
+
+    @pytest_asyncio.fixture(scope="class")
+    async def daily_log_id(self, app_client: AsyncClient) -> str:
+        r = await app_client.post("/daily/log")
+        assert r.status_code == 200
+
+        return r.json()["id"]  # type: ignore
+
+    async def test_list_routing(
+        self,
+        app_client: AsyncClient,
+        exercise_category_id: str,
+        daily_log_id: str,
+    ) -> None:
+        created_ids = []
+        for weight in range(5):
+            r = await app_client.post(
+                "/performance/log",
+                json={
+                    "count": 10,
+                    "weight": weight,
+                    "exercise_category_id": exercise_category_id,
+                    "daily_log_id": daily_log_id,
+                },
+            )
+            assert r.status_code == 200
+            created_ids.append(r.json()["id"])
+
+        # Case : walk through every page with the returned cursor
+
+        listed_ids: list[str] = []
+        cursor: str | None = None
+        while True:
+            params: dict[str, int | str] = {"limit": 2}
+            if cursor is not None:
+                params["cursor"] = cursor
+            r = await app_client.get("/performance/log", params=params)
+            assert r.status_code == 200
+            assert len(r.json()["items"]) <= 2
+
+            listed_ids.extend(item["id"] for item in r.json()["items"])
+            cursor = r.json()["next_cursor"]
+            if cursor is None:
+                break
+
+        assert listed_ids == created_ids
+
+        # Case : filtered by the parents and the date
+
+        r = await app_client.get(
+            "/performance/log",
+            params={
+                "daily_log_id": daily_log_id,
+                "exercise_category_id": exercise_category_id,
+            },
+        )
+        assert r.status_code == 200
+        assert [item["id"] for item in r.json()["items"]] == created_ids
+
+        r = await app_client.get("/performance/log", params={"until": "2000-01-01"})
+        assert r.status_code == 200
+        assert r.json()["items"] == []
+
+        # Case : malformed cursor
+
+        r = await app_client.get("/performance/log", params={"cursor": "malformed"})
+        assert r.status_code == 409
+        assert r.json()["code"] == "invalid_cursor"
+
+    async def test_series_routing(
+        self,
+        app_client: AsyncClient,
+        exercise_category_id: str,
+        daily_log_id: str,
+    ) -> None:
+        r = await app_client.post(
+            "/performance/log",
+            json={
+                "count": 10,
+                "weight": 80,
+                "exercise_category_id": exercise_category_id,
+                "daily_log_id": daily_log_id,
+            },
+        )
+        assert r.status_code == 200
+
+        r = await app_client.get(
+            "/performance/log/series",
+            params={"exercise_category_id": exercise_category_id, "points": 10},
+        )
+        assert r.status_code == 200
+        assert len(r.json()["dates"]) == 1
+        assert len(r.json()["volumes"]) == 1
+        assert r.json()["max_weights"] == [80]
+
+    async def test_batch_post_routing(
+        self,
+        app_client: AsyncClient,
+        exercise_category_id: str,
+        daily_log_id: str,
+    ) -> None:
+        r = await app_client.post(
+            "/performance/log/batch",
+            json={
+                "items": [
+                    {
+                        "count": 10,
+                        "weight": 60,
+                        "exercise_category_id": exercise_category_id,
+                        "daily_log_id": daily_log_id,
+                    },
+                    {
+                        "count": 10,
+                        "weight": 60,
+                        "exercise_category_id": "cdf87aab1c38404c93f0d19157d67e55",
+                        "daily_log_id": daily_log_id,
+                    },
+                    {
+                        "count": 8,
+                        "weight": 70,
+                        "exercise_category_id": exercise_category_id,
+                        "daily_log_id": daily_log_id,
+                    },
+                ]
+            },
+        )
+        assert r.status_code == 200
+
+        created, rejected, created_again = r.json()["items"]
+        assert created["id"] is not None
+        assert rejected["id"] is None
+        assert rejected["code"] == "model_not_found"
+        assert rejected["detail"] == {"ExerciseCategory": ["id"]}
+        assert created_again["id"] is not None
+
+        r = await app_client.get("/performance/log/:id", params={"id": created["id"]})
+        assert r.status_code == 200
+        assert r.json()["weight"] == 60
+
+    async def test_batch_post_parent_deleted_routing(
+        self,
+        app_settings: AppSettings,
+        app_client: AsyncClient,
+        exercise_category_id: str,
+    ) -> None:
+        async with with_app_ctx(app_settings):
+            daily_log = m.DailyLog(date=datetime.date(2000, 1, 1))
+            AppCtx.current.db.session.add(daily_log)
+            await AppCtx.current.db.session.commit()
+
+        # deletes the daily log between the checks of the parents and the INSERT
+        def _on_execute(
+            _conn: Any, _cursor: Any, statement: str, parameters: Any, *_: Any
+        ) -> tuple[str, Any]:
+            if statement.startswith("INSERT INTO performance_log "):
+                statement = (
+                    "WITH deleted_daily_log AS ("
+                    f"DELETE FROM daily_log WHERE id = '{daily_log.id}') "
+                    f"{statement}"
+                )
+            return statement, parameters
+
+        sa_event.listen(Engine, "before_cursor_execute", _on_execute, retval=True)
+        try:
+            r = await app_client.post(
+                "/performance/log/batch",
+                json={
+                    "items": [
+                        {
+                            "count": 10,
+                            "weight": 60,
+                            "exercise_category_id": exercise_category_id,
+                            "daily_log_id": str(daily_log.id),
+                        },
+                    ]
+                },
+            )
+        finally:
+            sa_event.remove(Engine, "before_cursor_execute", _on_execute)
+
+        assert r.status_code == 409
+        assert r.json()["code"] == "model_not_found"
+        assert r.json()["detail"] == {"DailyLog": ["id"]}
+
+    async def test_post_routing(
+        self,
+        app_client: AsyncClient,
+        exercise_category_id: str,
+        daily_log_id: str,
+    ) -> None:
+        r = await app_client.post(
+            "/performance/log",
+            json={
+                "count": 10,
+                "weight": 60,
+                "exercise_category_id": exercise_category_id,
+                "daily_log_id": "cdf87aab1c38404c93f0d19157d67e55",
+            },
+        )
+        assert r.status_code == 409
+        assert r.json()["code"] == "model_not_found"
+        assert r.json()["detail"] == {"DailyLog": ["id"]}
+
+        r = await app_client.post(
+            "/performance/log",
+            json={
+                "count": 10,
+                "weight": 60,
+                "exercise_category_id": "cdf87aab1c38404c93f0d19157d67e55",
+                "daily_log_id": daily_log_id,
+            },
+        )
+        assert r.status_code == 409
+        assert r.json()["code"] == "model_not_found"
+        assert r.json()["detail"] == {"ExerciseCategory": ["id"]}
+
+    async def test_import_post_routing(self, app_client: AsyncClient) -> None:
+        content = (
+            "date,exercise_category,weight,count\n"
+            "2020-01-01,deadlift,100,5\n"
+            "2020-01-01,deadlift,110,3\n"
+            "2020-01-02,squat,80,8\n"
+            "2020-13-01,squat,80,8\n"
+            "2020-01-02,squat,heavy,8\n"
+        )
+        r = await app_client.post(
+            "/performance/log/import",
+            files={"file": ("logs.csv", content.encode(), "text/csv")},
+        )
+        assert r.status_code == 200
+
+        progress = [json.loads(line) for line in r.text.splitlines()]
+        assert progress[0]["stage"] == "parsed"
+        assert progress[0]["rows"] == 3
+        assert [reject["line"] for reject in progress[0]["rejects"]] == [5, 6]
+        assert progress[1]["created_daily_logs"] == 2
+        assert progress[1]["created_exercise_categories"] == 1
+        assert progress[-1] == {"stage": "done", "created": 3}
+
+        # Case : invalid header
+
+        r = await app_client.post(
+            "/performance/log/import",
+            files={"file": ("logs.csv", b"weight,count\n60,10\n", "text/csv")},
+        )
+        assert r.status_code == 409
+        assert r.json()["code"] == "invalid_import_file"
+
+    async def test_list_conditional_get_routing(
+        self,
+        app_client: AsyncClient,
+        exercise_category_id: str,
+        daily_log_id: str,
+    ) -> None:
+        params = {"daily_log_id": daily_log_id}
+
+        r = await app_client.get("/performance/log", params=params)
+        assert r.status_code == 200
+        etag = r.headers["ETag"]
+
+        # Case : nothing changed
+
+        r = await app_client.get(
+            "/performance/log", params=params, headers={"If-None-Match": etag}
+        )
+        assert r.status_code == 304
+        assert r.headers["ETag"] == etag
+
+        # Case : another page of the same data
+
+        r = await app_client.get(
+            "/performance/log",
+            params={**params, "limit": 1},
+            headers={"If-None-Match": etag},
+        )
+        assert r.status_code == 200
+
+        # Case : a log is created
+
+        r = await app_client.post(
+            "/performance/log",
+            json={
+                "count": 5,
+                "weight": 100,
+                "exercise_category_id": exercise_category_id,
+                "daily_log_id": daily_log_id,
+            },
+        )
+        assert r.status_code == 200
+        created_id = r.json()["id"]
+
+        r = await app_client.get(
+            "/performance/log", params=params, headers={"If-None-Match": etag}
+        )
+        assert r.status_code == 200
+        assert r.headers["ETag"] != etag
+        etag = r.headers["ETag"]
+
+        # Case : a log is deleted
+
+        r = await app_client.delete("/performance/log/:id", params={"id": created_id})
+        assert r.status_code == 200
+
+        r = await app_client.get(
+            "/performance/log", params=params, headers={"If-None-Match": etag}
+        )
+        assert r.status_code == 200
+        assert created_id not in [item["id"] for item in r.json()["items"]]
+
+
+@pytest.mark.asyncio
+class TestApisPerformanceLogExport:
+    @pytest_asyncio.fixture(autouse=True, scope="class")
+    async def _init_db(self, app_settings: AppSettings) -> None:
+        async with with_app_ctx(app_settings):
+            await ensure_fresh_env()
+
+    @pytest_asyncio.fixture(scope="class")
+    async def performance_log_ids(self, app_settings: AppSettings) -> list[str]:
+        async with with_app_ctx(app_settings):
+            exercise_category = m.ExerciseCategory(name="squat")
+            daily_log = m.DailyLog(date=datetime.date(2000, 1, 1))
+            AppCtx.current.db.session.add_all([exercise_category, daily_log])
+            await AppCtx.current.db.session.flush()
+
+            # more rows than a single chunk of the export
+            performance_log_ids = [
+                m.uuid7() for _ in range(performance_log._EXPORT_CHUNK_SIZE * 2 + 1)
+            ]
+            await AppCtx.current.db.session.execute(
+                sa_exp.insert(m.PerformanceLog).values(
+                    [
+                        {
+                            "id": performance_log_id,
+                            "count": 10,
+                            "weight": i,
+                            "exercise_category_id": exercise_category.id,
+                            "daily_log_id": daily_log.id,
+                        }
+                        for i, performance_log_id in enumerate(performance_log_ids)
+                    ]
+                )
+            )
+            await AppCtx.current.db.session.commit()
+
+        return [str(performance_log_id) for performance_log_id in performance_log_ids]
+
+    async def test_export_empty_routing(self, app_client: AsyncClient) -> None:
+        r = await app_client.get("/performance/log/export")
+        assert r.status_code == 200
+        assert r.text == ""
+
+        r = await app_client.get("/performance/log/export", params={"format": "csv"})
+        assert r.status_code == 200
+        assert r.text == "id,created,daily_log_id,exercise_category_id,weight,count\r\n"
+
+    async def test_export_ndjson_routing(
+        self, app_client: AsyncClient, performance_log_ids: list[str]
+    ) -> None:
+        r = await app_client.get("/performance/log/export")
+        assert r.status_code == 200
+        assert r.headers["Content-Type"] == "application/x-ndjson"
+        assert r.headers["Content-Disposition"] == (
+            'attachment; filename="performance_log.ndjson"'
+        )
+
+        items = [json.loads(line) for line in r.text.splitlines()]
+        assert [item["id"] for item in items] == performance_log_ids
+        assert [item["weight"] for item in items] == list(
+            range(len(performance_log_ids))
+        )
+        assert items[0].keys() == {
+            "id",
+            "created",
+            "daily_log_id",
+            "exercise_category_id",
+            "weight",
+            "count",
+        }
+
+    async def test_export_csv_routing(
+        self, app_client: AsyncClient, performance_log_ids: list[str]
+    ) -> None:
+        r = await app_client.get("/performance/log/export", params={"format": "csv"})
+        assert r.status_code == 200
+        assert r.headers["Content-Type"].startswith("text/csv")
+
+        items = list(csv.DictReader(io.StringIO(r.text)))
+        assert [item["id"] for item in items] == performance_log_ids
+        assert [int(item["weight"]) for item in items] == list(
+            range(len(performance_log_ids))
+        )
+        assert items[0]["count"] == "10"
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+import pytest_asyncio
+
+from tests.helper import ensure_fresh_env, with_app_ctx
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+
+    from app.settings import AppSettings
+
+
+@pytest.mark.asyncio
+class TestApisPerformanceRollup:
+    @pytest_asyncio.fixture(autouse=True, scope="class")
+    async def _init_db(self, app_settings: AppSettings) -> None:
+        async with with_app_ctx(app_settings):
+            await ensure_fresh_env()
+
+            # do DB mocking here
+            pass
+
+    async def test_list_routing(self, app_client: AsyncClient) -> None:
+        r = await app_client.post("/exercise/category", json={"name": "squat"})
+        assert r.status_code == 200
+        exercise_category_id = r.json()["id"]
+
+        r = await app_client.post("/daily/log")
+        assert r.status_code == 200
+        daily_log_id = r.json()["id"]
+
+        performance_log_ids = []
+        for weight in (60, 70):
+            r = await app_client.post(
+                "/performance/log",
+                json={
+                    "count": 10,
+                    "weight": weight,
+                    "exercise_category_id": exercise_category_id,
+                    "daily_log_id": daily_log_id,
+                },
+            )
+            assert r.status_code == 200
+            performance_log_ids.append(r.json()["id"])
+
+        # Case : rollups follow creations
+
+        for period in ("week", "month"):
+            r = await app_client.get("/performance/rollup", params={"period": period})
+            assert r.status_code == 200
+            assert len(r.json()["items"]) == 1
+            assert r.json()["items"][0]["exercise_category_id"] == (
+                exercise_category_id
+            )
+            assert r.json()["items"][0]["volume"] == 1_300
+            assert r.json()["items"][0]["set_count"] == 2
+
+        # Case : rollups follow updates and deletions
+
+        r = await app_client.patch(
+            "/performance/log/:id",
+            params={"id": performance_log_ids[0]},
+            json={"count": 5},
+        )
+        assert r.status_code == 200
+
+        r = await app_client.delete(
+            "/performance/log/:id", params={"id": performance_log_ids[1]}
+        )
+        assert r.status_code == 200
+
+        r = await app_client.get("/performance/rollup", params={"period": "week"})
+        assert r.status_code == 200
+        assert r.json()["items"][0]["volume"] == 300
+        assert r.json()["items"][0]["set_count"] == 1
+
+        # Case : an empty rollup is not listed
+
+        r = await app_client.delete(
+            "/performance/log/:id", params={"id": performance_log_ids[0]}
+        )
+        assert r.status_code == 200
+
+        r = await app_client.get("/performance/rollup", params={"period": "month"})
+        assert r.status_code == 200
+        assert r.json()["items"] == []
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+import pytest_asyncio
+
+from tests.helper import ensure_fresh_env, with_app_ctx
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+
+    from app.settings import AppSettings
+
+
+@pytest.mark.asyncio
+class TestApisPersonalRecord:
+    @pytest_asyncio.fixture(autouse=True, scope="class")
+    async def _init_db(self, app_settings: AppSettings) -> None:
+        async with with_app_ctx(app_settings):
+            await ensure_fresh_env()
+
+            # do DB mocking here
+            pass
+
+    async def test_list_routing(self, app_client: AsyncClient) -> None:
+        r = await app_client.post("/exercise/category", json={"name": "squat"})
+        assert r.status_code == 200
+        exercise_category_id = r.json()["id"]
+
+        r = await app_client.post("/daily/log")
+        assert r.status_code == 200
+        daily_log_id = r.json()["id"]
+
+        r = await app_client.get(
+            "/exercise/category/:id/records", params={"id": exercise_category_id}
+        )
+        assert r.status_code == 200
+        assert r.json() == {
+            "best_weight": None,
+            "estimated_one_rep_max": None,
+            "items": [],
+        }
+
+        performance_log_ids = []
+        for weight, count in ((100, 5), (100, 8), (120, 1)):
+            r = await app_client.post(
+                "/performance/log",
+                json={
+                    "count": count,
+                    "weight": weight,
+                    "exercise_category_id": exercise_category_id,
+                    "daily_log_id": daily_log_id,
+                },
+            )
+            assert r.status_code == 200
+            performance_log_ids.append(r.json()["id"])
+
+        # Case : records are raised by creations
+
+        r = await app_client.get(
+            "/exercise/category/:id/records", params={"id": exercise_category_id}
+        )
+        assert r.status_code == 200
+        assert r.json()["best_weight"] == 120
+        assert r.json()["items"] == [
+            {"weight": 120, "count": 1},
+            {"weight": 100, "count": 8},
+        ]
+
+        # Case : records are lowered by deletions and updates
+
+        r = await app_client.delete(
+            "/performance/log/:id", params={"id": performance_log_ids[2]}
+        )
+        assert r.status_code == 200
+
+        r = await app_client.patch(
+            "/performance/log/:id",
+            params={"id": performance_log_ids[1]},
+            json={"count": 3},
+        )
+        assert r.status_code == 200
+
+        r = await app_client.get(
+            "/exercise/category/:id/records", params={"id": exercise_category_id}
+        )
+        assert r.status_code == 200
+        assert r.json()["best_weight"] == 100
+        assert r.json()["items"] == [{"weight": 100, "count": 5}]
@@ -13,7 +13,8 @@ from app.settings import AppSettings
 
 @pytest.fixture(scope="session")
 def app_settings() -> AppSettings:
-    return AppSettings(_env_file=".env.test")  # type: ignore
+    # every request of the tests comes from the same client IP
+    return AppSettings(_env_file=".env.test", RATE_LIMIT_ENABLED=False)  # type: ignore
 
 
 @pytest.fixture(scope="class")
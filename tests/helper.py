@@ -1,5 +1,8 @@
 import contextlib
-from typing import AsyncIterator
+from typing import Any, AsyncIterator, Iterator
+
+from sqlalchemy import event as sa_event
+from sqlalchemy.engine import Engine
 
 from app.ctx import AppCtx, bind_app_ctx, create_app_ctx
 from app.models.orm.base_ import Base as OrmBase
@@ -17,3 +20,18 @@ async def ensure_fresh_env() -> None:
     async with AppCtx.current.db.engine.begin() as conn:
         await conn.run_sync(OrmBase.metadata.drop_all)
         await conn.run_sync(OrmBase.metadata.create_all)
+
+
+@contextlib.contextmanager
+def record_statements() -> Iterator[list[str]]:
+    """Records the SQL statements executed by any engine in the meantime."""
+    statements: list[str] = []
+
+    def _on_execute(_conn: Any, _cursor: Any, statement: str, *_: Any) -> None:
+        statements.append(statement)
+
+    sa_event.listen(Engine, "before_cursor_execute", _on_execute)
+    try:
+        yield statements
+    finally:
+        sa_event.remove(Engine, "before_cursor_execute", _on_execute)
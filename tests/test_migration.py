@@ -0,0 +1,18 @@
+import importlib.util
+import pathlib
+
+from app.models.orm.base_ import UUID_GENERATE_V7_DDL
+
+_VERSIONS_DIR = pathlib.Path(__file__).parents[1] / "migration" / "versions"
+
+
+def test_uuid_generate_v7_of_migration() -> None:
+    spec = importlib.util.spec_from_file_location(
+        "use_time_ordered_ids", _VERSIONS_DIR / "5e0c9a7f3b21_use_time_ordered_ids.py"
+    )
+    assert spec is not None and spec.loader is not None
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    # the copy of the migration must create the same function as the metadata
+    assert migration._UUID_GENERATE_V7_SQL == UUID_GENERATE_V7_DDL.statement
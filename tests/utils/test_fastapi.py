@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import datetime
+import uuid
+from typing import TYPE_CHECKING
+
+import orjson
+import pytest
+from fastapi import FastAPI, Request, Response
+from httpx import AsyncClient
+from pydantic import BaseModel
+from sqlalchemy.sql import expression as sa_exp
+
+from app.ctx import AppCtx, create_app_ctx
+from app.models import orm as m
+from app.utils import sqla as sqla_utils
+from app.utils.fastapi import (
+    AppCtxMiddleware,
+    CustomAPIRouter,
+    ModelJSONResponse,
+    RateLimit,
+)
+from tests.helper import ensure_fresh_env, with_app_ctx
+
+if TYPE_CHECKING:
+    from app.settings import AppSettings
+
+
+class _ItemResponse(BaseModel):
+    id: uuid.UUID
+    name: str
+    created: datetime.datetime
+
+
+@pytest.mark.asyncio
+async def test_model_json_response_of_loaded_rows(app_settings: AppSettings) -> None:
+    async with with_app_ctx(app_settings):
+        await ensure_fresh_env()
+
+        AppCtx.current.db.session.add(m.ExerciseCategory(name="squat"))
+        await AppCtx.current.db.session.commit()
+
+        (row,) = await sqla_utils.read_rows(
+            sa_exp.select(
+                m.ExerciseCategory.id,
+                m.ExerciseCategory.name,
+                m.ExerciseCategory.created,
+            )
+        )
+
+    # the driver loads ids as a subclass of `uuid.UUID`
+    assert type(row.id) is not uuid.UUID
+
+    response = ModelJSONResponse(
+        [_ItemResponse(id=row.id, name=row.name, created=row.created)]
+    )
+    assert orjson.loads(response.body) == [
+        {
+            "id": str(row.id),
+            "name": "squat",
+            "created": row.created.isoformat(),
+        }
+    ]
+
+
+class _ClientResponse(BaseModel):
+    host: str
+
+
+@pytest.mark.asyncio
+async def test_api_wrapper_with_request_and_response(
+    app_settings: AppSettings,
+) -> None:
+    router = CustomAPIRouter()
+
+    @router.api_wrapper("GET", "/client")
+    async def _(request: Request, response: Response) -> _ClientResponse:
+        response.headers["X-Client"] = "seen"
+        return _ClientResponse(host=request.client.host)  # type: ignore
+
+    app = FastAPI(default_response_class=ModelJSONResponse)
+    app.add_middleware(AppCtxMiddleware)
+    app.include_router(router)
+    app.extra["_app_ctx"] = await create_app_ctx(app_settings)
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        r = await client.get("/client")
+
+    assert r.status_code == 200
+    assert r.json() == {"host": "127.0.0.1"}
+    assert r.headers["X-Client"] == "seen"
+
+
+@pytest.mark.asyncio
+async def test_api_wrapper_with_rate_limit(app_settings: AppSettings) -> None:
+    router = CustomAPIRouter()
+
+    @router.api_wrapper("GET", "/limited", rate_limit=RateLimit(rate=1 / 60, burst=2))
+    async def _limited() -> _ClientResponse:
+        return _ClientResponse(host="limited")
+
+    app = FastAPI(default_response_class=ModelJSONResponse)
+    app.add_middleware(AppCtxMiddleware)
+    app.include_router(router)
+    app.extra["_app_ctx"] = await create_app_ctx(
+        app_settings.copy(update={"RATE_LIMIT_ENABLED": True})
+    )
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        for _ in range(2):
+            r = await client.get("/limited")
+            assert r.status_code == 200
+
+        r = await client.get("/limited")
+        assert r.status_code == 429
+        assert r.json()["code"] == "too_many_requests"
+        assert 0 < int(r.headers["Retry-After"]) <= 60
+
+        # Case : another client IP
+
+        r = await client.get("/limited", headers={"X-Forwarded-For": "10.0.0.1"})
+        assert r.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_api_wrapper_with_stale_statement(app_settings: AppSettings) -> None:
+    router = CustomAPIRouter()
+    attempts: list[None] = []
+
+    @router.api_wrapper("GET", "/stale")
+    async def _stale() -> _ClientResponse:
+        attempts.append(None)
+        await AppCtx.current.db.session.execute(sa_exp.text("SELECT 1"))
+
+        if len(attempts) == 1:
+            # as if pgbouncer moved the connection to another server
+            await AppCtx.current.db.session.execute(sa_exp.text("DEALLOCATE ALL"))
+            await AppCtx.current.db.session.execute(sa_exp.text("SELECT 1"))
+
+        return _ClientResponse(host="stale")
+
+    app = FastAPI(default_response_class=ModelJSONResponse)
+    app.add_middleware(AppCtxMiddleware)
+    app.include_router(router)
+    app.extra["_app_ctx"] = await create_app_ctx(
+        app_settings.copy(update={"DB_PREPARED_STATEMENT_MODE": "pgbouncer"})
+    )
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        r = await client.get("/stale")
+
+    assert r.status_code == 200
+    assert len(attempts) == 2
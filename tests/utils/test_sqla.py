@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Literal
+
+import pytest
+from sqlalchemy.sql import expression as sa_exp
+
+from app.utils.sqla import SqlaEngineAndSession, _hashed_statement_name
+
+if TYPE_CHECKING:
+    from app.settings import AppSettings
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("prepared_statement_mode", ["disabled", "pgbouncer", "direct"])
+async def test_prepared_statement_mode(
+    app_settings: AppSettings,
+    prepared_statement_mode: Literal["disabled", "pgbouncer", "direct"],
+) -> None:
+    db = SqlaEngineAndSession(
+        app_settings.DB_URI,
+        app_settings.DB_OPTIONS,
+        prepared_statement_mode=prepared_statement_mode,
+        prepared_statement_cache_size=2,
+    )
+    prepared_statements_query = "SELECT name, statement FROM pg_prepared_statements"
+
+    try:
+        async with db.engine.connect() as conn:
+            for query in ["SELECT 1", "SELECT 2", "SELECT 3", "SELECT 3"]:
+                assert (await conn.execute(sa_exp.text(query))).scalar_one()
+
+            prepared_statements = dict(
+                (await conn.execute(sa_exp.text(prepared_statements_query)))
+                .tuples()
+                .all()
+            )
+    finally:
+        await db.engine.dispose()
+
+    statements = set(prepared_statements.values())
+
+    if prepared_statement_mode == "disabled":
+        assert statements.isdisjoint(["SELECT 1", "SELECT 2", "SELECT 3"])
+    elif prepared_statement_mode == "pgbouncer":
+        # the evicted ones are closed, and the kept ones are named by their SQL
+        assert prepared_statements == {
+            _hashed_statement_name("SELECT 3"): "SELECT 3",
+            _hashed_statement_name(
+                prepared_statements_query
+            ): prepared_statements_query,
+        }
+    else:
+        # reused from the cache of SQLAlchemy, under names of the driver
+        assert list(prepared_statements.values()).count("SELECT 3") == 1
+        assert not any(name.startswith("__sqla_") for name in prepared_statements)